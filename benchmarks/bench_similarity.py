@@ -0,0 +1,85 @@
+# Compare translator_app.similarity against the difflib scoring it replaced.
+# Run from the repository root: python -m benchmarks.bench_similarity
+import re
+import time
+import random
+import difflib
+
+from translator_app.similarity import prepare, similarity_ratio, batch_similarity
+
+WORDS = (
+    "the translation of this sentence should come back almost the same when "
+    "it is sent through another language and then returned to english with "
+    "small changes in word order articles and punctuation for each paragraph"
+).split()
+
+
+def difflib_ratio(a, b, autojunk=True):
+    # The normalization and matcher calculate_confidence used before
+    def normalize(text):
+        text = re.sub(r'\s+', ' ', text).strip().lower()
+        return re.sub(r'[^\w\s]', '', text)
+    return difflib.SequenceMatcher(None, normalize(a), normalize(b), autojunk=autojunk).ratio()
+
+
+def make_text(rng, length):
+    words = []
+    while sum(len(w) + 1 for w in words) < length:
+        words.append(rng.choice(WORDS))
+    text = " ".join(words)
+    return text[:1].upper() + text[1:length] + "."
+
+
+def mutate(rng, text, rate):
+    # Simulate a back-translation: swap, drop and replace some words
+    words = text.split()
+    for i in range(len(words)):
+        roll = rng.random()
+        if roll < rate / 3:
+            words[i] = rng.choice(WORDS)
+        elif roll < 2 * rate / 3 and i + 1 < len(words):
+            words[i], words[i + 1] = words[i + 1], words[i]
+        elif roll < rate:
+            words[i] = ""
+    return " ".join(w for w in words if w)
+
+
+def time_it(func, pairs, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = func(pairs)
+    return (time.perf_counter() - start) / (repeat * len(pairs)), results
+
+
+def main():
+    rng = random.Random(0)
+    # "diff" columns are mean / max absolute score differences against difflib.
+    # Above 200 characters difflib's autojunk heuristic discards common
+    # characters and its score collapses, so "no-junk" compares against
+    # difflib with autojunk=False, the score it was meant to approximate.
+    print(f"{'length':>7} {'difflib ms':>11} {'char ms':>9} {'token ms':>9} "
+          f"{'mean diff':>10} {'max diff':>9} {'no-junk mean':>13} {'no-junk max':>12}")
+    for length in (50, 200, 1000, 5000):
+        pairs = [(t, mutate(rng, t, 0.2)) for t in (make_text(rng, length) for _ in range(20))]
+        repeat = max(1, 2000 // length)
+        old_time, old = time_it(lambda p: [difflib_ratio(a, b) for a, b in p], pairs, repeat)
+        new_time, new = time_it(lambda p: [similarity_ratio(a, b) for a, b in p], pairs, repeat)
+        token_time, _ = time_it(lambda p: batch_similarity(p, level="token"), pairs, repeat)
+        reference = [difflib_ratio(a, b, autojunk=False) for a, b in pairs]
+        diffs = [abs(x - y) for x, y in zip(old, new)]
+        exact = [abs(x - y) for x, y in zip(reference, new)]
+        print(f"{length:>7} {old_time * 1000:>11.3f} {new_time * 1000:>9.3f} "
+              f"{token_time * 1000:>9.3f} {sum(diffs) / len(diffs):>10.3f} "
+              f"{max(diffs):>9.3f} {sum(exact) / len(exact):>13.3f} {max(exact):>12.3f}")
+
+    # Scoring one input against several candidates reuses its prepared masks
+    text = make_text(rng, 5000)
+    candidates = [mutate(rng, text, 0.2) for _ in range(10)]
+    prepared = prepare(text)
+    start = time.perf_counter()
+    batch_similarity([(prepared, c) for c in candidates])
+    print(f"\n1 x 10 batch at 5000 chars: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# Build translator_app/data/language_profiles.json from the sample sentences
+# in scripts/language_samples.json. Run from the repository root:
+#   python -m scripts.build_language_profiles
+#
+# Each language gets smoothed log-probabilities of its character 1-3 grams.
+# The softmax temperature is fitted on held-out sentences and fragments
+# (cross-validation) so that reported confidence tracks accuracy, and each
+# language's "fit" is the lowest per-gram log-likelihood its held-out
+# sentences scored, below which text is taken to be some other language.
+import os
+import json
+import math
+from collections import Counter
+
+from translator_app.config import DATA_DIR
+from translator_app.language_id import (
+    NGRAM_SIZES, LanguageIdentifier, detect_script, text_ngrams, normalize_for_language_id
+)
+
+SAMPLES_FILE = os.path.join(os.path.dirname(__file__), "language_samples.json")
+PROFILES_FILE = os.path.join(DATA_DIR, "language_profiles.json")
+MAX_GRAMS = 1500  # Most frequent n-grams kept per language
+SMOOTHING = 0.5
+FOLDS = 4
+TEMPERATURES = [t / 10 for t in range(5, 401, 5)]
+FIT_SLACK = 0.1  # Nats per gram allowed below the worst held-out sentence
+
+
+def build_profile(sentences):
+    counts = Counter()
+    scripts = Counter()
+    for sentence in sentences:
+        normalized = normalize_for_language_id(sentence)
+        counts.update(text_ngrams(normalized))
+        scripts[detect_script(normalized)] += 1
+    total = sum(counts.values())
+    vocabulary = len(counts) + 1
+    denominator = total + SMOOTHING * vocabulary
+    return {
+        "script": scripts.most_common(1)[0][0],
+        "floor": round(math.log(SMOOTHING / denominator), 3),
+        "grams": {
+            gram: round(math.log((count + SMOOTHING) / denominator), 3)
+            for gram, count in counts.most_common(MAX_GRAMS)
+        },
+    }
+
+
+def build_profiles(samples, temperature=1.0, fits=None):
+    languages = {code: build_profile(sentences) for code, sentences in sorted(samples.items())}
+    for code, fit in (fits or {}).items():
+        languages[code]["fit"] = fit
+    return {
+        "ngram_sizes": list(NGRAM_SIZES),
+        "temperature": temperature,
+        "languages": languages,
+    }
+
+
+def held_out_texts(sentence):
+    # The whole sentence plus the short fragments typed while detecting live
+    words = sentence.split()
+    yield sentence
+    for size in (1, 2, 4):
+        if len(words) > size:
+            yield " ".join(words[:size])
+
+
+def collect_scores(samples):
+    """(scores by language, true language, sentence) for every held-out text"""
+    scored = []
+    for fold in range(FOLDS):
+        train = {code: [s for i, s in enumerate(sentences) if i % FOLDS != fold]
+                 for code, sentences in samples.items()}
+        identifier = LanguageIdentifier(build_profiles(train))
+        for code, sentences in samples.items():
+            for i, sentence in enumerate(sentences):
+                if i % FOLDS != fold:
+                    continue
+                for text in held_out_texts(sentence):
+                    scores = identifier.scores(text)
+                    if len(scores) > 1:
+                        scored.append((scores, code, text if text == sentence else None))
+    return scored
+
+
+def fit_floors(scored):
+    """Lowest per-gram log-likelihood of each language's held-out sentences"""
+    floors = {}
+    for scores, code, sentence in scored:
+        if sentence is None:
+            continue
+        fit = scores[code] / len(text_ngrams(normalize_for_language_id(sentence)))
+        floors[code] = min(floors.get(code, fit), fit)
+    return {code: round(fit - FIT_SLACK, 3) for code, fit in floors.items()}
+
+
+def negative_log_likelihood(scored, temperature):
+    total = 0.0
+    for scores, code, _ in scored:
+        best = max(scores.values())
+        norm = sum(math.exp((s - best) / temperature) for s in scores.values())
+        total -= (scores.get(code, best - 1e9) - best) / temperature - math.log(norm)
+    return total / len(scored)
+
+
+def main():
+    with open(SAMPLES_FILE, 'r', encoding='utf-8') as f:
+        samples = json.load(f)
+
+    scored = collect_scores(samples)
+    temperature = min(TEMPERATURES, key=lambda t: negative_log_likelihood(scored, t))
+    correct = sum(1 for scores, code, _ in scored if max(scores, key=scores.get) == code)
+    print(f"Held-out texts: {len(scored)}, accuracy {correct / len(scored):.1%}, "
+          f"temperature {temperature}")
+
+    profiles = build_profiles(samples, temperature, fit_floors(scored))
+    with open(PROFILES_FILE, 'w', encoding='utf-8') as f:
+        json.dump(profiles, f, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+    print(f"Wrote {len(profiles['languages'])} profiles to {PROFILES_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2 @@
+# translator_app package.
+# The GUI lives in translator_app.state; translator_app.engine is the headless API.
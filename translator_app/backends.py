@@ -0,0 +1,228 @@
+# ===================== TRANSLATION BACKENDS =====================
+import os
+import re
+import json
+import time
+import threading
+
+from .cancellation import abort_on_cancel, check_cancelled
+from .client_pool import ClientPool
+from .config import (
+    DATA_DIR, TRANSLATION_BACKEND, TRANSLATION_TIMEOUT,
+    LOCAL_PHRASE_TABLE_FILE, LOCAL_BACKEND_LATENCY
+)
+
+BUNDLED_PHRASE_TABLE_FILE = os.path.join(DATA_DIR, "phrase_table.json")
+
+
+class TranslationBackend:
+    """Interface every translation backend implements"""
+
+    name = None
+    offline = False
+
+    def translate(self, text, source, target, timeout=TRANSLATION_TIMEOUT, token=None):
+        """Translate text; cancelling token should abort the call promptly"""
+        raise NotImplementedError
+
+    def translate_batch(self, texts, source, target, timeout=TRANSLATION_TIMEOUT, token=None):
+        return [self.translate(text, source, target, timeout, token) for text in texts]
+
+    def detect(self, text):
+        raise NotImplementedError
+
+    def get_supported_languages(self):
+        """Return a {language name: code} dict"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class GoogleBackend(TranslationBackend):
+    """Google Translate (needs network access).
+
+    Translations go through pooled keep-alive clients; detection and the
+    language list still come from deep-translator.
+    """
+
+    name = "google"
+
+    def __init__(self):
+        self.pool = ClientPool()
+
+    def translate(self, text, source, target, timeout=TRANSLATION_TIMEOUT, token=None):
+        with self.pool.client(source, target) as client:
+            with abort_on_cancel(token, client.aborter()):
+                return client.translate(text, timeout)
+
+    def translate_batch(self, texts, source, target, timeout=TRANSLATION_TIMEOUT, token=None):
+        with self.pool.client(source, target) as client:
+            with abort_on_cancel(token, client.aborter()):
+                return [client.translate(text, timeout) for text in texts]
+
+    def close(self):
+        self.pool.close()
+
+    def detect(self, text):
+        from deep_translator import GoogleTranslator
+        return GoogleTranslator().detect(text)
+
+    def get_supported_languages(self):
+        from deep_translator import GoogleTranslator
+        return GoogleTranslator().get_supported_languages(as_dict=True)
+
+
+_TOKEN_PATTERN = re.compile(r"\w+(?:'\w+)?|[^\w\s]+|\s+")
+
+
+class LocalBackend(TranslationBackend):
+    """Offline dictionary/phrase-table backend.
+
+    Phrases are matched greedily, longest first, on lowercase word tokens;
+    unknown words pass through unchanged. Tables are loaded from the bundled
+    data/phrase_table.json and LOCAL_PHRASE_TABLE_FILE if it exists, and
+    every pair is also usable in reverse. LOCAL_BACKEND_LATENCY adds a fixed
+    delay per call so pipelines can be load-tested with deterministic timing.
+    """
+
+    name = "local"
+    offline = True
+
+    def __init__(self, table_files=(BUNDLED_PHRASE_TABLE_FILE, LOCAL_PHRASE_TABLE_FILE),
+                 latency=LOCAL_BACKEND_LATENCY):
+        self.latency = latency
+        self._tables = {}
+        self._max_phrase_words = 1
+        self._lock = threading.Lock()
+        for path in table_files:
+            if path and os.path.exists(path):
+                self.load_table(path)
+
+    def load_table(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8-sig') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Error loading phrase table {path}: {e}")
+            return
+        for source, targets in data.items():
+            for target, phrases in targets.items():
+                for phrase, translation in phrases.items():
+                    self.add_phrase(source, target, phrase, translation)
+
+    def add_phrase(self, source, target, phrase, translation):
+        key = tuple(phrase.lower().split())
+        reverse_key = tuple(translation.lower().split())
+        if not key or not reverse_key:
+            return
+        with self._lock:
+            self._tables.setdefault((source, target), {})[key] = translation
+            self._tables.setdefault((target, source), {}).setdefault(reverse_key, phrase)
+            self._max_phrase_words = max(self._max_phrase_words, len(key), len(reverse_key))
+
+    def _simulate_latency(self, token=None):
+        if self.latency:
+            if token is None:
+                time.sleep(self.latency)
+            else:
+                token.wait(self.latency)
+        check_cancelled(token)
+
+    def translate(self, text, source, target, timeout=TRANSLATION_TIMEOUT, token=None):
+        self._simulate_latency(token)
+        if source == 'auto':
+            source = self._detect(text, target)
+        if source == target:
+            return text
+        table = self._tables.get((source, target), {})
+        tokens = _TOKEN_PATTERN.findall(text)
+        # Positions of word tokens, so phrases can span the whitespace between them
+        words = [i for i, piece in enumerate(tokens) if piece[0].isalnum() or piece[0] == "_"]
+        output = []
+        position = 0
+        w = 0
+        while w < len(words):
+            output.extend(tokens[position:words[w]])
+            match_length = 0
+            for length in range(min(self._max_phrase_words, len(words) - w), 0, -1):
+                key = tuple(tokens[i].lower() for i in words[w:w + length])
+                if key in table:
+                    match_length = length
+                    translation = table[key]
+                    if tokens[words[w]][:1].isupper():
+                        translation = translation[:1].upper() + translation[1:]
+                    output.append(translation)
+                    break
+            if not match_length:
+                output.append(tokens[words[w]])
+                match_length = 1
+            position = words[w + match_length - 1] + 1
+            w += match_length
+        output.extend(tokens[position:])
+        return "".join(output)
+
+    def _detect(self, text, exclude=None):
+        words = [token.lower() for token in _TOKEN_PATTERN.findall(text) if token[0].isalnum()]
+        scores = {}
+        for (source, _), table in self._tables.items():
+            if source == exclude:
+                continue
+            hits = sum(1 for word in words if (word,) in table)
+            scores[source] = max(scores.get(source, 0), hits)
+        if not scores or max(scores.values()) == 0:
+            return 'en'
+        return max(sorted(scores), key=scores.get)
+
+    def detect(self, text):
+        self._simulate_latency()
+        return self._detect(text)
+
+    def get_supported_languages(self):
+        codes = {code for pair in self._tables for code in pair}
+        try:
+            with open(os.path.join(DATA_DIR, "languages.json"), 'r', encoding='utf-8') as f:
+                code_to_name = json.load(f)["code_to_name"]
+        except Exception:
+            code_to_name = {}
+        return {code_to_name.get(code, code).lower(): code for code in codes}
+
+
+BACKENDS = {
+    GoogleBackend.name: GoogleBackend,
+    LocalBackend.name: LocalBackend,
+}
+
+_backend_instances = {}
+_backend_lock = threading.Lock()
+_active_backend = TRANSLATION_BACKEND
+
+
+def register_backend(name, backend_class):
+    BACKENDS[name] = backend_class
+
+
+def set_backend(name):
+    global _active_backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown translation backend: {name}")
+    _active_backend = name
+
+
+def close_backends():
+    with _backend_lock:
+        backends = list(_backend_instances.values())
+        _backend_instances.clear()
+    for backend in backends:
+        backend.close()
+
+
+def get_backend(name=None):
+    name = name or _active_backend
+    with _backend_lock:
+        backend = _backend_instances.get(name)
+        if backend is None:
+            if name not in BACKENDS:
+                raise ValueError(f"Unknown translation backend: {name}")
+            backend = _backend_instances[name] = BACKENDS[name]()
+        return backend
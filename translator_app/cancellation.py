@@ -0,0 +1,82 @@
+# ===================== REQUEST CANCELLATION =====================
+import itertools
+import threading
+from contextlib import contextmanager
+
+from .errors import TranslationCancelled
+
+_request_ids = itertools.count(1)
+
+
+class CancellationToken:
+    """Cancellation state for one translation request.
+
+    Code doing blocking work registers an abort callback with on_cancel()
+    (for example one that closes the HTTP connection), so cancelling stops
+    in-flight calls instead of waiting for them to time out.
+    """
+
+    def __init__(self, request_id=None):
+        self.request_id = next(_request_ids) if request_id is None else request_id
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        state = "cancelled" if self.cancelled else "active"
+        return f"<CancellationToken {self.request_id} {state}>"
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Cancellation callback error: {e}")
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise TranslationCancelled("Translation cancelled")
+
+    def wait(self, timeout=None):
+        """Sleep up to timeout seconds; returns True if cancelled meanwhile"""
+        return self._event.wait(timeout)
+
+    @contextmanager
+    def on_cancel(self, callback):
+        """Run callback if the token is cancelled while the block executes"""
+        with self._lock:
+            registered = not self._event.is_set()
+            if registered:
+                self._callbacks.append(callback)
+        if not registered:
+            callback()
+        try:
+            yield self
+        finally:
+            with self._lock:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+
+
+def check_cancelled(token):
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+@contextmanager
+def abort_on_cancel(token, callback):
+    """token.on_cancel(callback) that also accepts token=None"""
+    if token is None:
+        yield None
+    else:
+        with token.on_cancel(callback):
+            yield token
@@ -0,0 +1,241 @@
+# ===================== COMMAND-LINE INTERFACE =====================
+# python -m translator_app                   -> launch the GUI
+# python -m translator_app translate -t es   -> batch translate files or stdin
+import os
+import re
+import sys
+import csv
+import json
+import argparse
+import concurrent.futures
+from collections import deque
+
+from . import engine
+from .engine import TranslationError
+from .config import MAX_TRANSLATION_LENGTH, BATCH_WORKERS, BATCH_MAX_IN_FLIGHT
+
+FORMATS = ("text", "csv", "jsonl")
+
+
+def guess_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    return "text"
+
+
+def open_input(path):
+    if path == "-":
+        return sys.stdin
+    return open(path, 'r', encoding='utf-8-sig', newline='')
+
+
+def field_text(value):
+    # JSON null, numbers and nested values hold no text to translate
+    return value if isinstance(value, str) else ""
+
+
+def read_records(paths, input_format, field):
+    """Yield (record, text, error) triples; record is what gets written back out.
+
+    error is None unless the input itself could not be read, in which case
+    the record is reported with that error instead of being translated.
+    """
+    for path in paths:
+        fmt = input_format or ("text" if path == "-" else guess_format(path))
+        f = open_input(path)
+        try:
+            if fmt == "csv":
+                reader = csv.DictReader(f)
+                if reader.fieldnames and field not in reader.fieldnames:
+                    raise SystemExit(f"Field not found in {path}: {field} "
+                                     f"(columns: {', '.join(reader.fieldnames)})")
+                for row in reader:
+                    yield row, field_text(row.get(field)), None
+            elif fmt == "jsonl":
+                for number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError as e:
+                        yield {field: line.strip()}, "", f"Invalid JSON on line {number}: {e}"
+                        continue
+                    if not isinstance(record, dict):
+                        yield {field: record}, "", f"Line {number} is not a JSON object"
+                        continue
+                    yield record, field_text(record.get(field)), None
+            else:
+                # Blank lines are kept so output lines stay aligned with input lines
+                for line in f:
+                    line = line.rstrip("\r\n")
+                    yield {field: line}, line, None
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+
+def translate_record(text, source_code, target_code, noun_mode):
+    """Same pipeline as the GUI translation worker, without widgets"""
+    text = re.sub(r'\s+', ' ', text).strip()
+    if not text:
+        return {"translated": "", "source_code": source_code, "confidence": -1}
+    if not any(char.isalpha() for char in text):
+        raise TranslationError("No translatable text found (only numbers/symbols)")
+    if len(text) > MAX_TRANSLATION_LENGTH:
+        raise TranslationError(f"Text too long (max {MAX_TRANSLATION_LENGTH} chars)")
+
+    if source_code == 'auto':
+        source_code = engine.detect_language(text)[0] or 'auto'
+
+    result = engine.translate_with_confidence(text, source_code, target_code, noun_mode)
+    return {
+        "translated": result["translated"],
+        "source_code": source_code,
+        "confidence": result["confidence"]
+    }
+
+
+def translate_stream(records, source_code, target_code, noun_mode=False,
+                     workers=BATCH_WORKERS, max_in_flight=BATCH_MAX_IN_FLIGHT):
+    """Translate (record, text, error) triples concurrently, yielding results in input order.
+
+    At most max_in_flight records are pending at once, and identical source
+    strings inside that window share a single translation. Records that
+    arrive with an error are passed through with it, untranslated.
+    """
+    pending = deque()
+    shared = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        for record, text, error in records:
+            if error:
+                key, future = None, concurrent.futures.Future()
+                future.set_exception(TranslationError(error))
+            else:
+                key = re.sub(r'\s+', ' ', text).strip()
+                future = shared.get(key)
+                if future is None:
+                    future = pool.submit(translate_record, text, source_code, target_code, noun_mode)
+                    shared[key] = future
+            pending.append((record, key, future))
+
+            while len(pending) >= max_in_flight:
+                yield _finish(pending.popleft(), pending, shared)
+
+        while pending:
+            yield _finish(pending.popleft(), pending, shared)
+
+
+def _finish(item, pending, shared):
+    record, key, future = item
+    try:
+        outcome = future.result()
+        error = None
+    except TranslationError as e:
+        outcome, error = None, str(e)
+    except Exception as e:
+        outcome, error = None, engine.describe_error(e)
+    # Forget the shared future once nothing in the window refers to it
+    if shared.get(key) is future and not any(f is future for _, _, f in pending):
+        del shared[key]
+    return record, outcome, error
+
+
+def write_results(results, output, output_format):
+    writer = None
+    for record, outcome, error in results:
+        if output_format == "text":
+            output.write((outcome["translated"] if outcome else "") + "\n")
+            if error:
+                print(f"Error: {error}", file=sys.stderr)
+            continue
+
+        row = dict(record)
+        row["translated"] = outcome["translated"] if outcome else ""
+        row["source_lang"] = outcome["source_code"] if outcome else ""
+        row["confidence"] = outcome["confidence"] if outcome else -1
+        row["error"] = error or ""
+
+        if output_format == "csv":
+            if writer is None:
+                writer = csv.DictWriter(output, fieldnames=list(row.keys()), extrasaction='ignore')
+                writer.writeheader()
+            writer.writerow(row)
+        else:
+            output.write(json.dumps(row, ensure_ascii=False) + "\n")
+        output.flush()
+
+
+def resolve_language(value, allow_auto):
+    if allow_auto and value.lower() in ('auto', 'auto detect'):
+        return 'auto'
+    code_to_name, name_to_code, _ = engine.get_language_maps()
+    if value in code_to_name:
+        return value
+    for name, code in name_to_code.items():
+        if name.lower() == value.lower():
+            return code
+    raise SystemExit(f"Unknown language: {value}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m translator_app", description="Language Translator")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("gui", help="launch the desktop app (default)")
+
+    translate = subparsers.add_parser("translate", help="batch translate text, CSV or JSONL")
+    translate.add_argument("inputs", nargs="*", default=["-"], help="input files, '-' for stdin")
+    translate.add_argument("-t", "--target", required=True, help="target language code or name")
+    translate.add_argument("-s", "--source", default="auto", help="source language (default: auto)")
+    translate.add_argument("-o", "--output", default="-", help="output file, '-' for stdout")
+    translate.add_argument("-f", "--format", choices=FORMATS, help="input format (default: by extension)")
+    translate.add_argument("--output-format", choices=FORMATS, help="output format (default: input format)")
+    translate.add_argument("--field", default="text", help="CSV column or JSON field holding the text")
+    translate.add_argument("-n", "--noun-mode", action="store_true", help="use noun mode for short strings")
+    translate.add_argument("-b", "--backend", choices=sorted(engine.BACKENDS), help="translation backend")
+    translate.add_argument("-w", "--workers", type=int, default=BATCH_WORKERS)
+    translate.add_argument("--max-in-flight", type=int, default=BATCH_MAX_IN_FLIGHT)
+    return parser
+
+
+def run_translate(args):
+    if args.backend:
+        engine.set_backend(args.backend)
+    source_code = resolve_language(args.source, allow_auto=True)
+    target_code = resolve_language(args.target, allow_auto=False)
+
+    first_input = args.inputs[0]
+    input_format = args.format
+    output_format = args.output_format or input_format or (
+        "text" if first_input == "-" else guess_format(first_input)
+    )
+
+    engine.translation_cache.load()
+    records = read_records(args.inputs, input_format, args.field)
+    results = translate_stream(
+        records, source_code, target_code, args.noun_mode,
+        workers=max(1, args.workers),
+        max_in_flight=max(1, args.max_in_flight)
+    )
+
+    output = sys.stdout if args.output == "-" else open(args.output, 'w', encoding='utf-8', newline='')
+    try:
+        write_results(results, output, output_format)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        engine.translation_cache.flush()
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "translate":
+        return run_translate(args)
+
+    from .state import app, initialize_application
+    initialize_application()
+    app.mainloop()
+    return 0
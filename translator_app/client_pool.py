@@ -0,0 +1,212 @@
+# ===================== POOLED TRANSLATOR CLIENTS =====================
+import time
+import socket
+import weakref
+import threading
+from contextlib import contextmanager
+
+from .config import (
+    GOOGLE_TRANSLATE_URL, CLIENT_POOL_SIZE, CLIENT_POOL_MAX_IDLE, CLIENT_IDLE_TIMEOUT
+)
+from .errors import TranslationCancelled
+
+
+def _make_abortable_adapter(connections):
+    """HTTPAdapter whose connections are recorded in the connections WeakSet"""
+    from requests.adapters import HTTPAdapter
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    def tracking(pool_class):
+        class TrackingConnectionPool(pool_class):
+            def _new_conn(self):
+                conn = super()._new_conn()
+                connections.add(conn)
+                return conn
+        return TrackingConnectionPool
+
+    class AbortableAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {
+                "http": tracking(HTTPConnectionPool),
+                "https": tracking(HTTPSConnectionPool),
+            }
+
+    return AbortableAdapter(pool_connections=1, pool_maxsize=1)
+
+
+class GoogleClient:
+    """Google Translate client holding one keep-alive HTTP session.
+
+    Mirrors the request deep-translator's GoogleTranslator makes, but reuses
+    the TCP/TLS connection between calls instead of opening a new one.
+    abort() may be called from another thread to break an in-flight request;
+    aborter() returns an abort bound to the current checkout, which does
+    nothing once that checkout has ended.
+    """
+
+    def __init__(self, source, target):
+        import requests
+
+        self.source = source
+        self.target = target
+        self.aborted = False
+        self._use = 0  # Bumped by end_use(), so late aborts miss later checkouts
+        self._abort_lock = threading.Lock()
+        self._connections = weakref.WeakSet()
+        self.session = requests.Session()
+        self.session.mount("https://", _make_abortable_adapter(self._connections))
+        self.last_used = time.monotonic()
+
+    def abort(self, use=None):
+        with self._abort_lock:
+            if use is not None and use != self._use:
+                return
+            self.aborted = True
+            # Shutting the socket down wakes a thread blocked reading from it
+            for conn in list(self._connections):
+                sock = getattr(conn, "sock", None)
+                if sock is not None:
+                    try:
+                        sock.shutdown(socket.SHUT_RDWR)
+                    except OSError:
+                        pass
+            self.session.close()
+
+    def aborter(self):
+        use = self._use
+        return lambda: self.abort(use)
+
+    def end_use(self):
+        """Close the current checkout; returns False if it was aborted"""
+        with self._abort_lock:
+            self._use += 1
+            return not self.aborted
+
+    def translate(self, text, timeout):
+        if self.aborted:
+            raise TranslationCancelled("Translation cancelled")
+        try:
+            return self._translate(text, timeout)
+        except Exception:
+            if self.aborted:
+                raise TranslationCancelled("Translation cancelled")
+            raise
+
+    def _translate(self, text, timeout):
+        from bs4 import BeautifulSoup
+
+        if not text or not text.strip() or self.source == self.target:
+            return text
+        params = {"sl": self.source, "tl": self.target, "q": text}
+        with self.session.get(GOOGLE_TRANSLATE_URL, params=params, timeout=timeout) as response:
+            if response.status_code == 429:
+                raise RuntimeError("Too many requests to the translation server")
+            if response.status_code != 200:
+                raise RuntimeError(f"Translation request failed with status {response.status_code}")
+            soup = BeautifulSoup(response.text, "html.parser")
+        element = soup.find("div", {"class": "t0"}) or soup.find("div", {"class": "result-container"})
+        if not element:
+            raise RuntimeError("No translation found in the server response")
+        return element.get_text(strip=True)
+
+    def close(self):
+        self.session.close()
+
+
+class ClientPool:
+    """Reusable translator clients keyed by (source, target) language pair.
+
+    A client is checked out by one thread at a time. Up to pool_size idle
+    clients are kept per pair and max_idle overall; clients idle for longer
+    than idle_timeout seconds are closed.
+    """
+
+    def __init__(self, client_factory=GoogleClient, pool_size=CLIENT_POOL_SIZE,
+                 max_idle=CLIENT_POOL_MAX_IDLE, idle_timeout=CLIENT_IDLE_TIMEOUT):
+        self.client_factory = client_factory
+        self.pool_size = pool_size
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _evict_locked(self, now):
+        expired = []
+        for pair, clients in list(self._idle.items()):
+            keep = [client for client in clients if now - client.last_used <= self.idle_timeout]
+            expired.extend(client for client in clients if client not in keep)
+            if keep:
+                self._idle[pair] = keep
+            else:
+                del self._idle[pair]
+        # Over the global cap, drop the least recently used clients
+        idle = sorted(
+            (client for clients in self._idle.values() for client in clients),
+            key=lambda client: client.last_used
+        )
+        for client in idle[:max(0, len(idle) - self.max_idle)]:
+            self._idle[(client.source, client.target)].remove(client)
+            expired.append(client)
+        for pair in [pair for pair, clients in self._idle.items() if not clients]:
+            del self._idle[pair]
+        return expired
+
+    def _checkout(self, source, target):
+        now = time.monotonic()
+        with self._lock:
+            expired = self._evict_locked(now)
+            clients = self._idle.get((source, target))
+            client = clients.pop() if clients else None
+            if client is not None and client.aborted:
+                expired.append(client)
+                client = None
+        for stale in expired:
+            stale.close()
+        return client or self.client_factory(source, target)
+
+    def _checkin(self, client):
+        # An abort that raced with a successful return leaves a closed
+        # session behind; such a client is never pooled again
+        if not client.end_use():
+            client.close()
+            return
+        now = client.last_used = time.monotonic()
+        with self._lock:
+            clients = self._idle.setdefault((client.source, client.target), [])
+            if len(clients) < self.pool_size:
+                clients.append(client)
+                client = None
+            expired = self._evict_locked(now)
+        if client:
+            client.close()
+        for stale in expired:
+            stale.close()
+
+    @contextmanager
+    def client(self, source, target):
+        client = self._checkout(source, target)
+        broken = False
+        try:
+            yield client
+        except Exception:
+            # Do not hand a session that failed mid-request to the next caller
+            broken = True
+            raise
+        finally:
+            if broken:
+                client.end_use()
+                client.close()
+            else:
+                self._checkin(client)
+
+    def idle_count(self):
+        with self._lock:
+            return sum(len(clients) for clients in self._idle.values())
+
+    def close(self):
+        with self._lock:
+            clients = [client for clients in self._idle.values() for client in clients]
+            self._idle.clear()
+        for client in clients:
+            client.close()
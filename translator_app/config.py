@@ -3,10 +3,41 @@ import os
 from langdetect import DetectorFactory
 
 DEBOUNCE_TIME = 0.8
+TYPING_MAX_DELAY_MS = 3000  # While typing continues, detection and grammar still run this often
+SCHEDULER_FRAME_BUDGET_MS = 16  # UI tasks due together yield to the event loop after this long
 GRAMMAR_LANGUAGES = ['en'] 
+GRAMMAR_STARTUP_DELAY_MS = 500  # Delay before booting LanguageTool after the window appears
+GRAMMAR_CACHE_SIZE = 2000  # Sentences whose grammar matches are kept
+GRAMMAR_MEMORY_BUDGET_MB = 1024  # Memory the shared LanguageTool server may spend on language models
+GRAMMAR_LANGUAGE_MEMORY_MB = 256  # Rough size of one loaded language model
+GRAMMAR_PIPELINE_EXPIRE_SECONDS = 600  # Idle language pipelines are unloaded after this long
+GRAMMAR_SERVER_CACHE_SIZE = 1000  # Sentences LanguageTool caches results for on the server
 MAX_TEXT_LENGTH = 5000
 MAX_TRANSLATION_LENGTH = 15000
 TRANSLATION_TIMEOUT = 30
+TRANSLATION_BACKEND = os.environ.get("TRANSLATOR_BACKEND", "google")  # "google" or "local"
+LOCAL_PHRASE_TABLE_FILE = "phrase_table.json"  # Extra phrases for the offline backend
+LOCAL_BACKEND_LATENCY = 0.0  # Fixed delay per local call, in seconds, for load testing
+GOOGLE_TRANSLATE_URL = "https://translate.google.com/m"
+CLIENT_POOL_SIZE = 4  # Idle keep-alive clients kept per language pair
+CLIENT_POOL_MAX_IDLE = 16  # Idle clients kept across all pairs
+CLIENT_IDLE_TIMEOUT = 60  # Seconds before an idle client is closed
+CHUNKED_TRANSLATION_THRESHOLD = 2000  # Longer texts are split and translated in parallel
+TRANSLATION_CHUNK_SIZE = 1500
+TRANSLATION_CHUNK_WORKERS = 4
+BATCH_WORKERS = 4  # Concurrent translations in command-line batch mode
+BATCH_MAX_IN_FLIGHT = 32
+SINGLEFLIGHT_WORKERS = 8  # Shared backend calls run at once, per kind of call
+TM_THRESHOLD = 0.8  # Minimum similarity for a translation memory match to be suggested
+TM_MAX_ENTRIES = 20000  # Past translations kept in the translation memory
+LANGUAGE_ID_CACHE_SIZE = 2048  # Recent language detections kept, keyed by text hash
+LANGUAGE_ID_MIN_LETTERS = 3  # Shorter Latin/Cyrillic/Arabic text is not detected
+LANGUAGE_ID_MIN_CONFIDENCE = 0.5  # Less confident local results on long text are rechecked with langdetect
+LANGUAGE_ID_FALLBACK_LENGTH = 40  # Minimum text length for the langdetect recheck
+LANGUAGE_ID_MIN_MARGIN = 0.5  # Shorter text whose top two languages are closer than this is rechecked too
+LANGUAGE_ID_WINDOW = 400  # Characters sampled per detection while typing
+LANGUAGE_ID_STABLE_CONFIDENCE = 0.9  # While typing, a verdict this confident and
+LANGUAGE_ID_STABLE_CHECKS = 3  # confirmed this many times is no longer rechecked
 
 # Enhanced font sizes for better readability
 FONT_SIZE = 16
@@ -14,8 +45,22 @@ FONT_FAMILY = "Segoe UI" if os.name == 'nt' else "Roboto"
 FONT = (FONT_FAMILY, FONT_SIZE)
 BUTTON_FONT = (FONT_FAMILY, FONT_SIZE - 1)  # Button text size
 HEADER_FONT = (FONT_FAMILY, FONT_SIZE + 2, "bold")  # Larger for headers
-HISTORY_FILE = "translation_history.json"
-MAX_HISTORY_SIZE = 100
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")  # Files bundled with the app
+HISTORY_DB_FILE = "translation_history.db"  # SQLite; history is kept without a size cap
+HISTORY_PAGE_SIZE = 50  # Entries per history query page
+HISTORY_CACHED_PAGES = 8  # Query pages the history window keeps in memory
+HISTORY_CARD_HEIGHT = 380  # Fixed card height in pixels, so rows can be placed without measuring
+HISTORY_SEARCH_DELAY_MS = 200  # Pause in typing before the history search runs
+HISTORY_FILE = "translation_history.json"  # Older JSON history, imported into HISTORY_DB_FILE once
+HISTORY_JOURNAL_FILE = "translation_history.journal"
+CACHE_FILE = "translation_cache.json"
+MAX_CACHE_SIZE = 1000
+LANGUAGE_CACHE_FILE = "supported_languages.json"
+LANGUAGE_CACHE_TTL = 7 * 24 * 60 * 60  # Refresh the supported language list weekly
+APP_CACHE_NAME = "LanguageTranslator"  # Folder in the user cache directory
+TTS_CACHE_MAX_MB = 200  # Synthesized speech kept on disk for replay
+TTS_SEGMENT_CHARS = 200  # Speech is synthesized and queued in segments of whole sentences up to this long
+TTS_PREFETCH_SEGMENTS = 2  # Segments synthesized ahead of the one playing
 
 # Updated Color Scheme - Dark Mode (calm, professional)
 DARK_BG = "#1E1F29"
@@ -46,7 +91,8 @@ SIMILAR_LANGUAGE_GROUPS = {
     'zh': ['zh-cn', 'zh-tw', 'zh'],
     'no': ['nb', 'nn'],
     'pt': ['pt-br', 'pt-pt'],
-    'sr': ['sr-Cyrl', 'sr-Latn']
+    'sr': ['sr-Cyrl', 'sr-Latn'],
+    'iw': ['he']  # The language registry still uses Google's old Hebrew code
 }
 
 NOUN_CONTEXT_PHRASES = {
@@ -0,0 +1,462 @@
+# ===================== HEADLESS TRANSLATION ENGINE =====================
+# Plain Python API for translation, detection, confidence scoring and grammar.
+# Importing this module never creates a window, starts pygame or boots the
+# LanguageTool JVM, so it can be used from batch jobs and services.
+import threading
+import concurrent.futures
+from langdetect import detect_langs, LangDetectException
+
+from .config import (
+    GRAMMAR_LANGUAGES, MAX_TEXT_LENGTH, TRANSLATION_TIMEOUT,
+    CHUNKED_TRANSLATION_THRESHOLD, TRANSLATION_CHUNK_SIZE, TRANSLATION_CHUNK_WORKERS,
+    LANGUAGE_ID_MIN_LETTERS, LANGUAGE_ID_MIN_CONFIDENCE, LANGUAGE_ID_FALLBACK_LENGTH,
+    NOUN_CONTEXT_PHRASES
+)
+from .backends import BACKENDS, close_backends, get_backend, set_backend
+from .cancellation import CancellationToken, check_cancelled
+from .errors import TranslationError, TranslationCancelled
+from .grammar_cache import GrammarMatch, MatchIndex, SentenceGrammarCache
+from .grammar_server import (
+    GRAMMAR_LANGUAGE_VARIANTS, GRAMMAR_NOT_STARTED, GRAMMAR_STARTING, GRAMMAR_READY, GRAMMAR_FAILED,
+    GrammarServerPool, grammar_base_lang
+)
+from .language_id import IncrementalDetector, fold_language_code, language_identifier
+from .language_support import initialize_language_support, language_registry
+from .segmentation import split_into_chunks
+from .similarity import prepare, similarity_ratio
+from .singleflight import SingleFlight
+from .translation_cache import TranslationCache, make_cache_key
+from .translation_memory import TranslationMemory
+
+
+translation_cache = TranslationCache()
+translation_memory = TranslationMemory()
+
+# Identical requests in flight at the same time share one backend call
+_translation_flights = SingleFlight()
+_confidence_flights = SingleFlight()
+
+_languages_loaded = False
+_language_lock = threading.Lock()
+
+
+def get_language_maps(on_update=None):
+    """Return (code_to_name, name_to_code, name_list) from the language registry.
+
+    on_update(code_to_name, name_to_code, name_list) is called from a
+    background thread if the first load triggers a refresh.
+    """
+    global _languages_loaded
+    with _language_lock:
+        if not _languages_loaded:
+            initialize_language_support(on_update)
+            _languages_loaded = True
+    return language_registry.maps
+
+
+def get_language_name(lang_code):
+    code_to_name = get_language_maps()[0]
+    return code_to_name.get(lang_code, "Unknown")
+
+
+# --------------------- Confidence scoring ---------------------
+def is_identical_translation(original, translated):
+    return similarity_ratio(original, translated) > 0.95
+
+
+def calculate_confidence(original, back_translated):
+    original = prepare(original)
+    ratio = similarity_ratio(original, back_translated)
+    length_factor = min(1.0, len(original.normalized) / 50)
+    confidence = (ratio * 0.8 + length_factor * 0.2) * 100
+    return min(100, max(0, int(confidence)))
+
+
+# --------------------- Language detection ---------------------
+def recheck_language(text, result):
+    """result of identifying text locally, or langdetect's if the profiles are unsure.
+
+    Unsure means a language or script without a profile, or short text
+    close between two languages. Without a verdict, enough letters means an
+    unknown script rather than too little text.
+    """
+    lang_code, _, reliable = result
+    if reliable:
+        return result
+    if lang_code is None and sum(char.isalpha() for char in text) < LANGUAGE_ID_MIN_LETTERS:
+        return result
+    detections = detect_langs(text)
+    if not detections:
+        return result
+    return fold_language_code(detections[0].lang), detections[0].prob, True
+
+
+def detect_language(text, detector=None):
+    """Detect the language of text.
+
+    Returns (lang_code, confidence, message) where lang_code is 'auto' when
+    detection is not possible, confidence is a 0-1 float or None, and
+    message is a human readable status for display. Pass an
+    IncrementalDetector for text that is being typed.
+    """
+    text = text.strip()
+
+    if not text:
+        return 'auto', None, ""
+
+    # Skip detection for numeric/symbol-only content
+    if not any(char.isalpha() for char in text):
+        return 'auto', None, "Text contains only numbers/symbols"
+
+    try:
+        if detector is not None:
+            # The detector rechecks its own bounded samples, so a langdetect
+            # verdict counts toward its agreement and stability checks
+            lang_code, confidence, _ = detector.update(text)
+        else:
+            # Local n-gram profiles: no network, memoized per text
+            lang_code, confidence, reliable = recheck_language(text, language_identifier.identify(text))
+            # Long text with a low posterior is compared with langdetect too
+            if reliable and confidence < LANGUAGE_ID_MIN_CONFIDENCE and len(text) >= LANGUAGE_ID_FALLBACK_LENGTH:
+                detections = detect_langs(text)
+                if detections and detections[0].prob > confidence:
+                    lang_code = fold_language_code(detections[0].lang)
+                    confidence = detections[0].prob
+
+        if lang_code is None:
+            if len(text) < 10:
+                return 'auto', None, "Text too short for detection"
+            return 'auto', None, "Detection Failed"
+
+        lang_name = "Chinese" if lang_code == 'zh' else get_language_name(lang_code)
+        conf_text = f"{confidence*100:.1f}%"
+
+        if confidence < 0.5:
+            return lang_code, confidence, f"Detected: {lang_name} (Low confidence: {conf_text})"
+        return lang_code, confidence, f"Detected: {lang_name} ({conf_text})"
+
+    except LangDetectException:
+        return 'auto', None, "Detection Error"
+    except Exception as e:
+        print(f"Detection error: {e}")
+        return 'auto', None, "Detection Failed"
+
+
+# --------------------- Translation ---------------------
+def normalize_language_code(lang_code):
+    # Handle Chinese variants
+    return 'zh' if lang_code in ['zh-cn', 'zh-tw'] else lang_code
+
+
+def translate(text, source_code, target_code, noun_mode=False, token=None):
+    """Translate text once, without caching or confidence scoring"""
+    source_code_used = normalize_language_code(source_code)
+    target_code_used = normalize_language_code(target_code)
+
+    # Enhanced noun translation using context phrases
+    if noun_mode and len(text) < 50:
+        context_phrase = NOUN_CONTEXT_PHRASES.get(source_code_used, NOUN_CONTEXT_PHRASES["en"])
+        context_text = context_phrase.format(text=text)
+
+        # Translate context phrase
+        translated = get_backend().translate(
+            context_text, source_code_used, target_code_used,
+            timeout=TRANSLATION_TIMEOUT, token=token
+        )
+
+        check_cancelled(token)
+
+        # Extract the translated noun by removing the context phrase
+        context_target = NOUN_CONTEXT_PHRASES.get(target_code_used, NOUN_CONTEXT_PHRASES["en"])
+        if context_target in translated:
+            return translated.replace(context_target, "").strip()
+        # Fallback to standard translation if context removal fails
+
+    return get_backend().translate(
+        text, source_code_used, target_code_used,
+        timeout=TRANSLATION_TIMEOUT, token=token
+    )
+
+
+_chunk_pool = None
+_chunk_pool_lock = threading.Lock()
+
+
+def _get_chunk_pool():
+    # Created on first use so importing the engine starts no threads
+    global _chunk_pool
+    with _chunk_pool_lock:
+        if _chunk_pool is None:
+            _chunk_pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=TRANSLATION_CHUNK_WORKERS,
+                thread_name_prefix="translate-chunk"
+            )
+        return _chunk_pool
+
+
+def translate_chunked(text, source_code, target_code, on_chunk=None, token=None,
+                      chunk_size=TRANSLATION_CHUNK_SIZE):
+    """Translate long text as sentence-aligned chunks in parallel.
+
+    on_chunk(index, text) is called in input order as soon as every earlier
+    chunk has finished, so callers can stream the result. Returns the
+    reassembled translation.
+    """
+    chunks = split_into_chunks(text, chunk_size)
+    pool = _get_chunk_pool()
+    futures = {
+        pool.submit(translate, chunk, source_code, target_code, False, token): index
+        for index, (chunk, _) in enumerate(chunks)
+    }
+    results = [None] * len(chunks)
+    next_index = 0
+    try:
+        for future in concurrent.futures.as_completed(futures):
+            results[futures[future]] = future.result() or ""
+            check_cancelled(token)
+            # Emit the contiguous finished prefix in order
+            while next_index < len(chunks) and results[next_index] is not None:
+                piece = results[next_index] + chunks[next_index][1]
+                if on_chunk:
+                    on_chunk(next_index, piece)
+                next_index += 1
+    finally:
+        for future in futures:
+            future.cancel()
+
+    return "".join(results[i] + chunks[i][1] for i in range(len(chunks)))
+
+
+def score_confidence(text, translated, source_code, target_code, token=None):
+    """Back-translate and score the result.
+
+    Returns (confidence, back_translation_failed); confidence is -1 when the
+    text is too long to be scored.
+    """
+    if not 0 < len(text) <= MAX_TEXT_LENGTH:
+        return -1, False
+    try:
+        back_translated = get_backend().translate(
+            translated,
+            normalize_language_code(target_code),
+            normalize_language_code(source_code),
+            timeout=TRANSLATION_TIMEOUT,
+            token=token
+        )
+    except TranslationCancelled:
+        raise
+    except Exception as e:
+        print(f"Back translation error: {e}")
+        return -1, True
+
+    check_cancelled(token)
+
+    if not back_translated or back_translated.strip() == "":
+        return -1, True
+    return calculate_confidence(text, back_translated), False
+
+
+def translate_primary(text, source_code, target_code, noun_mode=False, token=None,
+                      on_chunk=None):
+    """Translate text without waiting for the back-translation.
+
+    Texts longer than CHUNKED_TRANSLATION_THRESHOLD are translated with
+    translate_chunked, streaming pieces to on_chunk. Returns a dict with
+    translated, confidence, back_translation_failed, target_code_used and
+    cached keys; confidence is None until score_translation fills it in,
+    unless it came from the cache or translation memory. Raises
+    TranslationError when the result is unusable and TranslationCancelled
+    once token is cancelled.
+
+    Concurrent calls for the same text and languages are coalesced; only the
+    first caller's on_chunk receives streamed pieces.
+    """
+    target_code_used = normalize_language_code(target_code)
+    backend = get_backend().name
+    cached = translation_cache.get(text, source_code, target_code, noun_mode, backend)
+    if cached:
+        return {
+            "translated": cached["translated"],
+            "confidence": cached["confidence"],
+            "back_translation_failed": False,
+            "target_code_used": target_code_used,
+            "cached": True
+        }
+
+    # Exact repeats of past translations skip the backend entirely; fuzzy
+    # matches, even at score 1.0, can differ in case or punctuation
+    match = translation_memory.exact_match(text, source_code, target_code, noun_mode, backend)
+    if match:
+        return {
+            "translated": match["translated"],
+            "confidence": match["confidence"],
+            "back_translation_failed": False,
+            "target_code_used": target_code_used,
+            "cached": True
+        }
+
+    translated = _translation_flights.do(
+        make_cache_key(text, source_code, target_code, noun_mode, backend),
+        lambda shared_token: _translate_checked(
+            text, source_code, target_code, noun_mode, shared_token, on_chunk
+        ),
+        token
+    )
+    return {
+        "translated": translated,
+        "confidence": None,
+        "back_translation_failed": False,
+        "target_code_used": target_code_used,
+        "cached": False
+    }
+
+
+def _translate_checked(text, source_code, target_code, noun_mode, token, on_chunk):
+    if len(text) > CHUNKED_TRANSLATION_THRESHOLD:
+        translated = translate_chunked(text, source_code, target_code, on_chunk, token)
+    else:
+        translated = translate(text, source_code, target_code, noun_mode, token)
+    check_cancelled(token)
+
+    if not translated or translated.strip() == "":
+        raise TranslationError("Empty translation result")
+
+    if is_identical_translation(text, translated):
+        raise TranslationError("Translation identical to input")
+    return translated
+
+
+def _score_and_cache(text, translated, source_code, target_code, noun_mode, backend, token):
+    confidence, back_translation_failed = score_confidence(
+        text, translated, source_code, target_code, token
+    )
+
+    if not back_translation_failed:
+        # Callers decide when to persist with translation_cache.flush()
+        translation_cache.put(text, source_code, target_code, noun_mode, backend, translated, confidence)
+        translation_memory.add(text, translated, source_code, target_code, noun_mode, backend, confidence)
+    return confidence, back_translation_failed
+
+
+def suggest_translation(text, source_code, target_code, noun_mode=False):
+    """Closest past translation at or above TM_THRESHOLD, or None.
+
+    Local lookup only, cheap enough to run on every pause in typing.
+    """
+    return translation_memory.best_match(text, source_code, target_code, noun_mode, get_backend().name)
+
+
+def score_translation(text, result, source_code, target_code, noun_mode=False, token=None):
+    """Fill in the back-translation confidence of a translate_primary result"""
+    if result["confidence"] is not None:
+        return result
+
+    translated = result["translated"]
+    backend = get_backend().name
+    confidence, back_translation_failed = _confidence_flights.do(
+        make_cache_key(text, source_code, target_code, noun_mode, backend) + "\x1f" + translated,
+        lambda shared_token: _score_and_cache(
+            text, translated, source_code, target_code, noun_mode, backend, shared_token
+        ),
+        token
+    )
+
+    return dict(result, confidence=confidence, back_translation_failed=back_translation_failed)
+
+
+def translate_with_confidence(text, source_code, target_code, noun_mode=False, token=None,
+                              on_chunk=None):
+    """Translate text and score it by back-translation, using the cache"""
+    result = translate_primary(text, source_code, target_code, noun_mode, token, on_chunk)
+    return score_translation(text, result, source_code, target_code, noun_mode, token)
+
+
+def describe_error(error):
+    """Turn a backend exception into a short user-facing message"""
+    error_msg = str(error)
+    if "timed out" in error_msg.lower():
+        return "Translation timed out. Try shorter text."
+    if "connection" in error_msg.lower():
+        return "Network error. Check your internet connection."
+    if "too many requests" in error_msg.lower():
+        return "API limit exceeded. Please wait before trying again."
+    return f"Translation failed: {error}"
+
+
+# --------------------- Grammar checking ---------------------
+grammar_server = GrammarServerPool()
+grammar_cache = SentenceGrammarCache()
+
+
+def get_grammar_state(lang_code):
+    return grammar_server.state(lang_code)
+
+
+def is_grammar_ready(lang_code):
+    return get_grammar_state(lang_code) == GRAMMAR_READY
+
+
+def start_grammar_tool(lang_code, on_ready=None):
+    """Start grammar checking for lang_code on a background thread.
+
+    Returns immediately; on_ready(base_lang) is called from that thread once
+    the language is usable. All languages share one LanguageTool server.
+    """
+    return grammar_server.start(lang_code, on_ready)
+
+
+def start_grammar_tools(languages=GRAMMAR_LANGUAGES, on_ready=None):
+    for lang_code in languages:
+        start_grammar_tool(lang_code, on_ready)
+
+
+def get_grammar_tool(lang_code, wait=False, on_ready=None):
+    """Return the LanguageTool client for lang_code if it is warm.
+
+    A cold language is started in the background. With wait=False this
+    returns None until it is ready, calling on_ready(base_lang) from the
+    startup thread once it is; with wait=True it blocks until startup
+    finishes.
+    """
+    return grammar_server.get(lang_code, wait, on_ready)
+
+
+def is_grammar_checkable(text):
+    if not text.strip() or len(text) > MAX_TEXT_LENGTH:
+        return False
+
+    # Skip grammar check for non-text content
+    if not any(char.isalpha() for char in text):
+        return False
+
+    # Skip grammar check for non-Latin scripts
+    if any('\u4e00' <= char <= '\u9fff' for char in text):  # Chinese
+        return False
+    if any('\u3040' <= char <= '\u30ff' for char in text):  # Japanese
+        return False
+    if any('\uac00' <= char <= '\ud7a3' for char in text):  # Korean
+        return False
+    if any('\u0600' <= char <= '\u06ff' for char in text):  # Arabic
+        return False
+    return True
+
+
+def check_grammar(text, lang_code, wait=True):
+    """Return GrammarMatch objects for text, or [] when it cannot be checked"""
+    if not is_grammar_checkable(text):
+        return []
+    tool = get_grammar_tool(lang_code, wait=wait)
+    if not tool:
+        return []
+    # Only sentences not checked before go to LanguageTool
+    return grammar_cache.check(text, grammar_base_lang(lang_code), tool.check)
+
+
+def close_grammar_tools():
+    grammar_server.close()
+    grammar_cache.clear()
+
+
+def close_flights():
+    _translation_flights.close()
+    _confidence_flights.close()
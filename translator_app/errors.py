@@ -0,0 +1,9 @@
+# ===================== ERRORS =====================
+
+
+class TranslationError(Exception):
+    """Raised when a translation produces no usable result"""
+
+
+class TranslationCancelled(TranslationError):
+    """Raised when a translation request is cancelled or superseded"""
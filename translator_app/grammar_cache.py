@@ -0,0 +1,167 @@
+# ===================== SENTENCE GRAMMAR CACHE =====================
+# Grammar matches are cached per sentence, keyed by a hash of its content,
+# with offsets relative to the sentence. Checking a document only sends the
+# sentences that changed to LanguageTool, joined into one request; cached
+# matches are shifted to wherever their sentence sits now. MatchIndex maps matches to Tk text
+# indexes and finds the match under the mouse without asking Tk.
+import bisect
+import hashlib
+import threading
+from collections import OrderedDict
+
+from .config import GRAMMAR_CACHE_SIZE
+from .segmentation import split_sentences
+
+# Unseen sentences are checked as separate paragraphs of one text
+_BATCH_SEPARATOR = "\n\n"
+
+
+class GrammarMatch:
+    """A LanguageTool match detached from the tool, with its own offset.
+
+    Keeps the attribute names of language_tool_python's Match so callers
+    can use either.
+    """
+
+    __slots__ = ("offset", "errorLength", "message", "replacements", "ruleId")
+
+    def __init__(self, offset, errorLength, message, replacements=(), ruleId=None):
+        self.offset = offset
+        self.errorLength = errorLength
+        self.message = message
+        self.replacements = list(replacements)
+        self.ruleId = ruleId
+
+    @classmethod
+    def from_match(cls, match):
+        return cls(
+            match.offset, match.errorLength, match.message,
+            match.replacements, getattr(match, "ruleId", None)
+        )
+
+    def shifted(self, delta):
+        return GrammarMatch(self.offset + delta, self.errorLength, self.message, self.replacements, self.ruleId)
+
+
+class SentenceGrammarCache:
+    """Thread-safe LRU of per-sentence grammar matches.
+
+    check(text, lang_code, check_fn) returns matches for the whole text,
+    calling check_fn once on the sentences not seen before in that language
+    and splitting its matches back by offset. Holds at most max_sentences
+    sentences.
+    """
+
+    def __init__(self, max_sentences=GRAMMAR_CACHE_SIZE):
+        self.max_sentences = max_sentences
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, sentence, lang_code):
+        digest = hashlib.blake2b(sentence.encode('utf-8'), digest_size=16).digest()
+        return lang_code, digest
+
+    def check(self, text, lang_code, check_fn):
+        sentences = [(start, text[start:end]) for start, end in split_sentences(text)]
+        found = {}
+        with self._lock:
+            for _, sentence in sentences:
+                key = self._key(sentence, lang_code)
+                cached = self._entries.get(key)
+                if cached is not None:
+                    self._entries.move_to_end(key)
+                    found[sentence] = cached
+
+        missing = list(dict.fromkeys(sentence for _, sentence in sentences if sentence not in found))
+        if missing:
+            checked = self._check_batch(missing, check_fn)
+            with self._lock:
+                for sentence, cached in checked.items():
+                    self._entries[self._key(sentence, lang_code)] = cached
+                while len(self._entries) > self.max_sentences:
+                    self._entries.popitem(last=False)
+            found.update(checked)
+
+        matches = []
+        for start, sentence in sentences:
+            matches.extend(match.shifted(start) for match in found[sentence])
+        return matches
+
+    def _check_batch(self, sentences, check_fn):
+        """Sentence -> its matches, from one check_fn call on all of them"""
+        starts = []
+        position = 0
+        for sentence in sentences:
+            starts.append(position)
+            position += len(sentence) + len(_BATCH_SEPARATOR)
+        checked = {sentence: [] for sentence in sentences}
+        for match in check_fn(_BATCH_SEPARATOR.join(sentences)):
+            i = bisect.bisect_right(starts, match.offset) - 1
+            offset = match.offset - starts[i]
+            # A match running into the separator belongs to no one sentence
+            if offset + match.errorLength > len(sentences[i]):
+                continue
+            checked[sentences[i]].append(GrammarMatch(
+                offset, match.errorLength, match.message,
+                match.replacements, getattr(match, "ruleId", None)
+            ))
+        return checked
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class MatchIndex:
+    """Matches over a text, sorted for hit-testing by character offset.
+
+    Converts offsets to Tk "line.column" indexes with a precomputed table of
+    line starts, and finds the match covering an offset by bisection rather
+    than comparing against every match.
+    """
+
+    def __init__(self, text, matches):
+        self.matches = sorted(matches, key=lambda match: match.offset)
+        self._starts = [match.offset for match in self.matches]
+        # Running maximum of match ends, so overlapping matches are found
+        self._max_ends = []
+        max_end = -1
+        for match in self.matches:
+            max_end = max(max_end, match.offset + match.errorLength)
+            self._max_ends.append(max_end)
+        self._line_starts = [0]
+        position = text.find("\n")
+        while position != -1:
+            self._line_starts.append(position + 1)
+            position = text.find("\n", position + 1)
+
+    def __len__(self):
+        return len(self.matches)
+
+    def tk_index(self, offset):
+        line = bisect.bisect_right(self._line_starts, offset) - 1
+        return f"{line + 1}.{offset - self._line_starts[line]}"
+
+    def offset(self, tk_index):
+        line, column = (int(part) for part in tk_index.split("."))
+        if line > len(self._line_starts):
+            return None
+        return self._line_starts[line - 1] + column
+
+    def tag_ranges(self):
+        """Flat start/end Tk indexes of every match, for one tag_add call"""
+        ranges = []
+        for match in self.matches:
+            ranges.append(self.tk_index(match.offset))
+            ranges.append(self.tk_index(match.offset + match.errorLength))
+        return ranges
+
+    def match_at(self, offset):
+        """The last-starting match with start <= offset <= end, or None"""
+        i = bisect.bisect_right(self._starts, offset) - 1
+        while i >= 0 and self._max_ends[i] >= offset:
+            match = self.matches[i]
+            if offset <= match.offset + match.errorLength:
+                return match
+            i -= 1
+        return None
@@ -0,0 +1,189 @@
+# ===================== SHARED GRAMMAR SERVER =====================
+# One local LanguageTool server (a single JVM) serves every grammar
+# language. The first language to start boots it; each language then gets a
+# lightweight client that talks to it over HTTP via remote_server (one
+# request per check; the client keeps no connection open). Language
+# models load in the server on first use, and at most as many languages as
+# fit GRAMMAR_MEMORY_BUDGET_MB stay active, least recently used out first.
+import threading
+from collections import OrderedDict
+
+from .config import (
+    GRAMMAR_MEMORY_BUDGET_MB, GRAMMAR_LANGUAGE_MEMORY_MB,
+    GRAMMAR_PIPELINE_EXPIRE_SECONDS, GRAMMAR_SERVER_CACHE_SIZE
+)
+
+GRAMMAR_LANGUAGE_VARIANTS = {
+    'en': 'en-US',
+    'de': 'de-DE',
+    'fr': 'fr',
+    'es': 'es',
+}
+
+# Grammar engine states
+GRAMMAR_NOT_STARTED = "not_started"
+GRAMMAR_STARTING = "starting"
+GRAMMAR_READY = "ready"
+GRAMMAR_FAILED = "failed"
+
+
+def grammar_base_lang(lang_code):
+    return (lang_code or '').split('-')[0].lower()
+
+
+def max_grammar_languages(budget_mb=GRAMMAR_MEMORY_BUDGET_MB, per_language_mb=GRAMMAR_LANGUAGE_MEMORY_MB):
+    return max(1, budget_mb // per_language_mb)
+
+
+class GrammarServerPool:
+    """Language clients of one shared LanguageTool server, LRU-bounded.
+
+    start(lang_code) creates the client for a language on a background
+    thread (booting the server first if needed); get(lang_code) returns it
+    once ready. Starting a language beyond max_languages closes the least
+    recently used one, and the server is configured to keep no more
+    language pipelines than that, dropping idle ones after a while.
+    """
+
+    def __init__(self, max_languages=None):
+        self.max_languages = max_languages or max_grammar_languages()
+        self._server = None
+        self._server_failed = False
+        self._server_lock = threading.Lock()
+        self._tools = OrderedDict()
+        self._states = {}
+        self._events = {}
+        self._callbacks = {}  # base_lang -> on_ready callbacks while starting
+        self._lock = threading.Lock()
+
+    # --------------------- Server ---------------------
+    def _server_config(self):
+        return {
+            'pipelineCaching': True,
+            'maxPipelinePoolSize': self.max_languages,
+            'pipelineExpireTimeInSeconds': GRAMMAR_PIPELINE_EXPIRE_SECONDS,
+            'cacheSize': GRAMMAR_SERVER_CACHE_SIZE,
+        }
+
+    def _ensure_server(self, variant):
+        """URL of the shared server, booting it with variant the first time"""
+        with self._server_lock:
+            if self._server is None and not self._server_failed:
+                try:
+                    import language_tool_python
+                    self._server = language_tool_python.LanguageTool(variant, config=self._server_config())
+                except Exception as e:
+                    print(f"Grammar server failed to start: {e}")
+                    self._server_failed = True
+            if self._server is None:
+                return None
+            # language_tool_python keeps the local server's address as .../v2/
+            return self._server._url.rsplit('v2/', 1)[0]
+
+    # --------------------- Languages ---------------------
+    def state(self, lang_code):
+        with self._lock:
+            return self._states.get(grammar_base_lang(lang_code), GRAMMAR_NOT_STARTED)
+
+    def _start(self, base_lang, variant):
+        url = self._ensure_server(variant)
+        tool = None
+        if url is not None:
+            try:
+                import language_tool_python
+                tool = language_tool_python.LanguageTool(variant, remote_server=url)
+            except Exception as e:
+                print(f"Grammar engine failed to start for {variant}: {e}")
+        evicted = []
+        with self._lock:
+            event = self._events[base_lang]
+            callbacks = self._callbacks.pop(base_lang, [])
+            if tool is None:
+                self._states[base_lang] = GRAMMAR_FAILED
+            else:
+                self._tools[base_lang] = tool
+                self._states[base_lang] = GRAMMAR_READY
+                while len(self._tools) > self.max_languages:
+                    lang, old_tool = self._tools.popitem(last=False)
+                    self._states.pop(lang, None)
+                    evicted.append(old_tool)
+            event.set()
+        for old_tool in evicted:
+            self._close_tool(old_tool)
+        if tool is not None:
+            for on_ready in callbacks:
+                on_ready(base_lang)
+
+    def start(self, lang_code, on_ready=None):
+        """Start lang_code in the background; False if it has no grammar support.
+
+        on_ready(base_lang) is called from that thread once the language is
+        usable. Calling it again while starting only adds on_ready, and once
+        ready calls it right away.
+        """
+        base_lang = grammar_base_lang(lang_code)
+        variant = GRAMMAR_LANGUAGE_VARIANTS.get(base_lang)
+        if not variant:
+            return False
+        with self._lock:
+            state = self._states.get(base_lang)
+            if state == GRAMMAR_STARTING:
+                if on_ready:
+                    self._callbacks[base_lang].append(on_ready)
+                return True
+            if state != GRAMMAR_READY:
+                self._states[base_lang] = GRAMMAR_STARTING
+                self._events[base_lang] = threading.Event()
+                self._callbacks[base_lang] = [on_ready] if on_ready else []
+        if state == GRAMMAR_READY:
+            if on_ready:
+                on_ready(base_lang)
+            return True
+        threading.Thread(
+            target=self._start,
+            args=(base_lang, variant),
+            name=f"grammar-{base_lang}",
+            daemon=True
+        ).start()
+        return True
+
+    def get(self, lang_code, wait=False, on_ready=None):
+        """The client for lang_code if ready, starting it when cold.
+
+        With wait=False this returns None until it is ready, and on_ready is
+        called as in start(); with wait=True it blocks until startup finishes.
+        """
+        base_lang = grammar_base_lang(lang_code)
+        with self._lock:
+            tool = self._tools.get(base_lang)
+            if tool is not None:
+                self._tools.move_to_end(base_lang)
+                return tool
+            state = self._states.get(base_lang, GRAMMAR_NOT_STARTED)
+        if state == GRAMMAR_FAILED:
+            return None
+        if not self.start(base_lang, on_ready) or not wait:
+            return None
+        self._events[base_lang].wait()
+        with self._lock:
+            return self._tools.get(base_lang)
+
+    def _close_tool(self, tool):
+        try:
+            tool.close()
+        except Exception:
+            pass
+
+    def close(self):
+        with self._lock:
+            tools = list(self._tools.values())
+            self._tools.clear()
+            self._states.clear()
+            self._callbacks.clear()
+        for tool in tools:
+            self._close_tool(tool)
+        with self._server_lock:
+            if self._server is not None:
+                self._close_tool(self._server)
+                self._server = None
+            self._server_failed = False
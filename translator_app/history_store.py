@@ -0,0 +1,302 @@
+# ===================== TRANSLATION HISTORY =====================
+# History lives in an SQLite database (HISTORY_DB_FILE) with indexes on
+# timestamp and language pair and an FTS5 index over the texts, so it can
+# grow without a cap while pages and searches stay fast. Writes are queued
+# to a writer thread that group-commits them in one transaction.
+import os
+import json
+import queue
+import sqlite3
+import threading
+
+from .config import HISTORY_FILE, HISTORY_JOURNAL_FILE, HISTORY_DB_FILE, HISTORY_PAGE_SIZE
+from .translation_cache import code_from_label
+
+_STOP = object()
+
+_COLUMNS = ("id", "timestamp", "source", "target", "original", "translated", "confidence", "noun_mode", "backend")
+_SELECT_COLUMNS = ", ".join(f"history.{column}" for column in _COLUMNS)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    source_code TEXT,
+    target_code TEXT,
+    original TEXT NOT NULL,
+    translated TEXT NOT NULL,
+    confidence INTEGER NOT NULL DEFAULT -1,
+    noun_mode INTEGER NOT NULL DEFAULT 0,
+    backend TEXT
+);
+CREATE INDEX IF NOT EXISTS history_timestamp ON history (timestamp);
+CREATE INDEX IF NOT EXISTS history_pair ON history (source_code, target_code);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5 (
+    original, translated, content='history', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS history_fts_insert AFTER INSERT ON history BEGIN
+    INSERT INTO history_fts (rowid, original, translated)
+    VALUES (new.id, new.original, new.translated);
+END;
+CREATE TRIGGER IF NOT EXISTS history_fts_delete AFTER DELETE ON history BEGIN
+    INSERT INTO history_fts (history_fts, rowid, original, translated)
+    VALUES ('delete', old.id, old.original, old.translated);
+END;
+"""
+
+
+def _fts_query(search):
+    # Quote every word so user input is never parsed as FTS syntax; the
+    # trailing * makes the last word match as a prefix while typing
+    words = [word.replace('"', '""') for word in search.split()]
+    if not words:
+        return None
+    return " ".join(f'"{word}"' for word in words[:-1]) + f' "{words[-1]}"*'
+
+
+def _row_to_entry(row):
+    entry = dict(zip(_COLUMNS, row))
+    entry["noun_mode"] = bool(entry["noun_mode"])
+    return entry
+
+
+def _read_legacy_history(path, journal_path):
+    """Entries from the JSON snapshot and journal used by earlier versions"""
+    entries, seq = [], 0
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            entries = data
+        else:
+            entries, seq = data.get("entries", []), data.get("seq", 0)
+    if os.path.exists(journal_path):
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("seq", 0) <= seq:
+                    continue
+                seq = record["seq"]
+                if record["op"] == "add":
+                    entries.append(record["entry"])
+                elif record["op"] == "delete":
+                    entries = [e for e in entries if e.get("id") != record["id"]]
+                elif record["op"] == "clear":
+                    entries = []
+    return entries
+
+
+class HistoryStore:
+    """Thread-safe, uncapped translation history.
+
+    Reads return entries as dicts, newest first. add, delete and clear
+    return immediately; reads wait for queued writes first, so callers always
+    see their own changes.
+    """
+
+    def __init__(self, path=HISTORY_DB_FILE, legacy_path=HISTORY_FILE,
+                 legacy_journal_path=HISTORY_JOURNAL_FILE):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.legacy_journal_path = legacy_journal_path
+        self.fts = False
+        self._conn = None
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = None
+
+    # --------------------- Setup ---------------------
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def load(self):
+        with self._lock:
+            if self._conn is not None:
+                return
+            conn = self._connect()
+            conn.executescript(_SCHEMA)
+            # Databases created before the backend was recorded
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(history)")}
+            if "backend" not in columns:
+                with conn:
+                    conn.execute("ALTER TABLE history ADD COLUMN backend TEXT")
+            try:
+                conn.executescript(_FTS_SCHEMA)
+                self.fts = True
+            except sqlite3.OperationalError as e:
+                # SQLite built without FTS5; search falls back to LIKE
+                print(f"History full-text search unavailable: {e}")
+            self._migrate_legacy(conn)
+            self._conn = conn
+
+    def _migrate_legacy(self, conn):
+        if not os.path.exists(self.legacy_path) and not os.path.exists(self.legacy_journal_path):
+            return
+        try:
+            entries = _read_legacy_history(self.legacy_path, self.legacy_journal_path)
+        except Exception as e:
+            print(f"Error loading history: {e}")
+            return
+        with conn:
+            conn.executemany(*self._insert_statement(entries))
+        for path in (self.legacy_path, self.legacy_journal_path):
+            if os.path.exists(path):
+                os.replace(path, f"{path}.migrated")
+
+    def _insert_statement(self, entries):
+        rows = [(
+            entry.get("timestamp", ""),
+            entry.get("source", ""),
+            entry.get("target", ""),
+            code_from_label(entry.get("source")),
+            code_from_label(entry.get("target")),
+            entry.get("original", ""),
+            entry.get("translated", ""),
+            entry.get("confidence", -1),
+            1 if entry.get("noun_mode", False) else 0,
+            entry.get("backend")
+        ) for entry in entries]
+        return (
+            "INSERT INTO history (timestamp, source, target, source_code, target_code, "
+            "original, translated, confidence, noun_mode, backend) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+
+    # --------------------- Reads ---------------------
+    def _from_where(self, search, source_code, target_code, join=True):
+        """FROM/WHERE clause, parameters and sort key for the given filters.
+
+        join=False allows a search without language filters to skip the
+        history table entirely (enough for counting).
+        """
+        tables, order, clauses, params = "history", "history.id", [], []
+        match = _fts_query(search) if search else None
+        if match and self.fts:
+            # CROSS JOIN keeps the full-text index as the outer loop, so the
+            # newest matches stream out in rowid order without a sort
+            order = "history_fts.rowid"
+            if join or source_code or target_code:
+                tables = "history_fts CROSS JOIN history ON history.id = history_fts.rowid"
+            else:
+                tables = "history_fts"
+            clauses.append("history_fts MATCH ?")
+            params.append(match)
+        elif match:
+            clauses.append("(history.original LIKE ? OR history.translated LIKE ?)")
+            params.extend([f"%{search.strip()}%"] * 2)
+        if source_code:
+            clauses.append("history.source_code = ?")
+            params.append(source_code)
+        if target_code:
+            clauses.append("history.target_code = ?")
+            params.append(target_code)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        return f" FROM {tables}{where}", params, order
+
+    def _read(self, sql, params):
+        self.load()
+        self.flush()
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def query(self, offset=0, limit=HISTORY_PAGE_SIZE, search=None, source_code=None, target_code=None):
+        """One page of entries, newest first, optionally filtered"""
+        from_where, params, order = self._from_where(search, source_code, target_code)
+        rows = self._read(
+            f"SELECT {_SELECT_COLUMNS}{from_where} ORDER BY {order} DESC LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        )
+        return [_row_to_entry(row) for row in rows]
+
+    def count(self, search=None, source_code=None, target_code=None):
+        from_where, params, _ = self._from_where(search, source_code, target_code, join=False)
+        return self._read(f"SELECT COUNT(*){from_where}", params)[0][0]
+
+    def get(self, entry_id):
+        rows = self._read(f"SELECT {_SELECT_COLUMNS} FROM history WHERE history.id = ?", [entry_id])
+        return _row_to_entry(rows[0]) if rows else None
+
+    def recent(self, limit=HISTORY_PAGE_SIZE):
+        return self.query(0, limit)
+
+    # --------------------- Writes ---------------------
+    def add(self, entry):
+        self._enqueue(("add", entry))
+
+    def delete(self, entry_id):
+        self._enqueue(("delete", entry_id))
+
+    def clear(self):
+        self._enqueue(("clear", None))
+
+    def _enqueue(self, op):
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+                self._writer.start()
+            self._queue.put(op)
+
+    def _write_loop(self):
+        while True:
+            # Group commit: everything queued meanwhile goes in one transaction
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            ops = [op for op in batch if op is not _STOP]
+            try:
+                if ops:
+                    self._write(ops)
+            except Exception as e:
+                print(f"Error saving history: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if len(ops) < len(batch):
+                return
+
+    def _write(self, ops):
+        self.load()
+        with self._lock:
+            with self._conn:
+                for kind, value in ops:
+                    if kind == "add":
+                        self._conn.executemany(*self._insert_statement([value]))
+                    elif kind == "delete":
+                        self._conn.execute("DELETE FROM history WHERE id = ?", (value,))
+                    elif kind == "clear":
+                        self._conn.execute("DELETE FROM history")
+
+    def flush(self):
+        """Block until every queued change has been committed"""
+        if self._writer is not None:
+            self._queue.join()
+
+    def close(self):
+        with self._lock:
+            writer = self._writer
+            self._writer = None
+            if writer is not None:
+                self._queue.put(_STOP)
+        if writer is not None:
+            writer.join()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+history_store = HistoryStore()
@@ -0,0 +1,152 @@
+# ===================== VIRTUALIZED HISTORY LIST =====================
+# Only the cards in view exist as widgets. A small pool of fixed-height
+# cards is moved around a canvas and refilled as the list scrolls, and
+# entries are fetched from the history store a page at a time.
+import tkinter as tk
+from collections import OrderedDict
+
+import customtkinter as ctk
+
+from .config import HISTORY_PAGE_SIZE, HISTORY_CACHED_PAGES
+from .theme import get_bg_color, get_scroll_thumb_color, get_button_primary
+
+
+class VirtualHistoryList:
+    """Scrollable list of history cards backed by paged queries.
+
+    create_card(parent) builds one reusable card and fill_card(card, entry,
+    index) shows an entry in it. fetch(offset, limit) returns entries newest
+    first and count() the total, so cost depends on the window size rather
+    than the length of the history.
+    """
+
+    def __init__(self, master, row_height, create_card, fill_card, fetch, count,
+                 page_size=HISTORY_PAGE_SIZE, cached_pages=HISTORY_CACHED_PAGES):
+        self.row_height = row_height
+        self.create_card = create_card
+        self.fill_card = fill_card
+        self.page_size = page_size
+        self.cached_pages = cached_pages
+        self.total = 0
+        self._fetch = fetch
+        self._count = count
+        self._pages = OrderedDict()
+        self._slots = []  # [canvas window id, card, index shown]
+
+        self.frame = ctk.CTkFrame(master, fg_color="transparent")
+        self.frame.grid_columnconfigure(0, weight=1)
+        self.frame.grid_rowconfigure(0, weight=1)
+        self.canvas = tk.Canvas(
+            self.frame, bg=get_bg_color(), highlightthickness=0, bd=0, yscrollincrement=20
+        )
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar = ctk.CTkScrollbar(
+            self.frame,
+            command=self.canvas.yview,
+            fg_color="transparent",
+            button_color=get_scroll_thumb_color(),
+            button_hover_color=get_button_primary(),
+            width=16
+        )
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.canvas.configure(yscrollcommand=self._on_scroll)
+        self.canvas.bind("<Configure>", lambda e: self._layout())
+
+        # Wheel events go to whichever widget is under the pointer (a card
+        # textbox usually) and reach the toplevel through its bindtags
+        toplevel = self.frame.winfo_toplevel()
+        toplevel.bind("<MouseWheel>", self._on_wheel, add="+")
+        toplevel.bind("<Button-4>", lambda e: self.canvas.yview_scroll(-3, "units"), add="+")
+        toplevel.bind("<Button-5>", lambda e: self.canvas.yview_scroll(3, "units"), add="+")
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+    # --------------------- Data ---------------------
+    def reload(self, fetch=None, count=None):
+        """Drop cached pages and start again from the top"""
+        if fetch is not None:
+            self._fetch = fetch
+        if count is not None:
+            self._count = count
+        self._pages.clear()
+        self.total = self._count()
+        self.canvas.yview_moveto(0)
+        self._invalidate(0)
+
+    def remove(self, index):
+        """Forget the entry at index after it was deleted from the store"""
+        self.total = max(0, self.total - 1)
+        page = index // self.page_size
+        # Later rows shift up by one, so only pages from this one on go stale
+        for cached in [p for p in self._pages if p >= page]:
+            del self._pages[cached]
+        self._invalidate(index)
+
+    def entry(self, index):
+        page = index // self.page_size
+        entries = self._pages.get(page)
+        if entries is None:
+            entries = self._pages[page] = self._fetch(page * self.page_size, self.page_size)
+            while len(self._pages) > self.cached_pages:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(page)
+        offset = index - page * self.page_size
+        return entries[offset] if offset < len(entries) else None
+
+    # --------------------- Rendering ---------------------
+    def _invalidate(self, from_index):
+        for slot in self._slots:
+            if slot[2] is not None and slot[2] >= from_index:
+                slot[2] = None
+        self._layout()
+
+    def _layout(self):
+        width = self.canvas.winfo_width()
+        self.canvas.configure(scrollregion=(0, 0, width, self.total * self.row_height))
+        for window_id, _, _ in self._slots:
+            self.canvas.itemconfigure(window_id, width=width)
+        self._render()
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self._render()
+
+    def _render(self):
+        top = max(0, int(self.canvas.canvasy(0)))
+        height = max(self.canvas.winfo_height(), self.row_height)
+        first = top // self.row_height
+        last = min(self.total, (top + height) // self.row_height + 1)
+        visible = max(0, last - first)
+
+        # Grow the pool to what fits on screen; it never shrinks
+        while len(self._slots) < visible:
+            card = self.create_card(self.canvas)
+            window_id = self.canvas.create_window(
+                0, 0, window=card, anchor="nw",
+                width=self.canvas.winfo_width(), height=self.row_height
+            )
+            self._slots.append([window_id, card, None])
+
+        # Keep cards that already show a visible row; refill the rest
+        shown = {slot[2]: slot for slot in self._slots if slot[2] is not None and first <= slot[2] < last}
+        free = [slot for slot in self._slots if slot[2] is None or not first <= slot[2] < last]
+        for index in range(first, last):
+            slot = shown.get(index)
+            if slot is None:
+                entry = self.entry(index)
+                if entry is None:
+                    continue
+                slot = free.pop()
+                self.fill_card(slot[1], entry, index)
+                slot[2] = index
+            self.canvas.coords(slot[0], 0, index * self.row_height)
+            self.canvas.itemconfigure(slot[0], state="normal")
+        for slot in free:
+            slot[2] = None
+            self.canvas.itemconfigure(slot[0], state="hidden")
+
+    def _on_wheel(self, event):
+        # Windows reports multiples of 120, macOS small deltas
+        self.canvas.yview_scroll(-3 if event.delta > 0 else 3, "units")
@@ -0,0 +1,306 @@
+# ===================== LOCAL LANGUAGE IDENTIFICATION =====================
+# Offline language detection from character n-gram profiles bundled in
+# data/language_profiles.json (built by scripts/build_language_profiles.py).
+# The writing system settles most non-Latin languages outright; the rest are
+# scored with naive Bayes over 1-3 grams among the languages of that script.
+# The softmax over those scores only says which known language fits best, so
+# results are also flagged unreliable when the winner fits the text worse
+# than its own held-out samples did, or barely beats the runner-up on short
+# text.
+import os
+import json
+import math
+import hashlib
+import threading
+import unicodedata
+from collections import Counter, OrderedDict
+
+from .config import (
+    DATA_DIR, LANGUAGE_ID_CACHE_SIZE, LANGUAGE_ID_MIN_LETTERS, LANGUAGE_ID_WINDOW,
+    LANGUAGE_ID_FALLBACK_LENGTH, LANGUAGE_ID_MIN_MARGIN, LANGUAGE_ID_STABLE_CONFIDENCE,
+    LANGUAGE_ID_STABLE_CHECKS, SIMILAR_LANGUAGE_GROUPS
+)
+
+PROFILES_FILE = os.path.join(DATA_DIR, "language_profiles.json")
+NGRAM_SIZES = (1, 2, 3)
+
+# (first, last, script) ranges checked in order
+_SCRIPT_RANGES = (
+    (0x0041, 0x024F, "Latn"),
+    (0x1E00, 0x1EFF, "Latn"),
+    (0x0370, 0x03FF, "Grek"),
+    (0x1F00, 0x1FFF, "Grek"),
+    (0x0400, 0x052F, "Cyrl"),
+    (0x0590, 0x05FF, "Hebr"),
+    (0x0600, 0x06FF, "Arab"),
+    (0x0750, 0x077F, "Arab"),
+    (0xFB50, 0xFDFF, "Arab"),
+    (0xFE70, 0xFEFF, "Arab"),
+    (0x0900, 0x097F, "Deva"),
+    (0x0E00, 0x0E7F, "Thai"),
+    (0x1100, 0x11FF, "Hang"),
+    (0x3130, 0x318F, "Hang"),
+    (0xAC00, 0xD7A3, "Hang"),
+    (0x3040, 0x30FF, "Kana"),
+    (0x3400, 0x4DBF, "Hani"),
+    (0x4E00, 0x9FFF, "Hani"),
+)
+
+
+def fold_language_code(lang_code):
+    """Map regional variants to the base code (e.g. zh-cn -> zh, nb -> no)"""
+    for base_lang, variants in SIMILAR_LANGUAGE_GROUPS.items():
+        if lang_code in variants:
+            return base_lang
+    return lang_code
+
+
+def normalize_for_language_id(text):
+    """Lowercase letters and combining marks, everything else as single spaces"""
+    chars = [
+        ch if ch.isalpha() or unicodedata.category(ch).startswith('M') else ' '
+        for ch in text.lower()
+    ]
+    return " ".join("".join(chars).split())
+
+
+def char_script(ch):
+    code = ord(ch)
+    for first, last, script in _SCRIPT_RANGES:
+        if first <= code <= last:
+            return script
+    return None
+
+
+def script_counts(normalized):
+    counts = Counter(char_script(ch) for ch in normalized if ch != ' ')
+    counts.pop(None, None)
+    # Japanese mixes kana with kanji; any kana makes Han text Japanese
+    if counts.get("Kana"):
+        counts["Jpan"] = counts.pop("Kana") + counts.pop("Hani", 0)
+    return counts
+
+
+def detect_script(normalized):
+    counts = script_counts(normalized)
+    return counts.most_common(1)[0][0] if counts else None
+
+
+def text_ngrams(normalized):
+    """Character n-grams of each word, padded with spaces at word edges"""
+    grams = []
+    for word in normalized.split():
+        padded = f" {word} "
+        for n in NGRAM_SIZES:
+            grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return [gram for gram in grams if gram.strip()]
+
+
+class LanguageIdentifier:
+    """Thread-safe local language identifier with a memo of recent results.
+
+    identify(text) returns (lang_code, confidence, reliable) with confidence
+    in [0, 1], or (None, 0.0, False) when the text is too short or in an
+    unknown script. reliable is False when the text looks like a language
+    without a profile, or is short and about as likely to be another language.
+    """
+
+    def __init__(self, profiles=None, path=PROFILES_FILE, cache_size=LANGUAGE_ID_CACHE_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        self._profiles = None
+        self._by_script = {}
+        self._gram_tables = {}
+        self._temperature = 1.0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        if profiles is not None:
+            self._set_profiles(profiles)
+
+    def _set_profiles(self, profiles):
+        self._temperature = profiles.get("temperature", 1.0)
+        self._profiles = profiles["languages"]
+        self._by_script = {}
+        for code, profile in sorted(self._profiles.items()):
+            self._by_script.setdefault(profile["script"], []).append(code)
+        # Per script, each gram maps to (language index, gain over the floor),
+        # so scoring only touches the languages that have seen the gram
+        self._gram_tables = {}
+        for script, codes in self._by_script.items():
+            table = {}
+            for i, code in enumerate(codes):
+                profile = self._profiles[code]
+                for gram, logp in profile["grams"].items():
+                    table.setdefault(gram, []).append((i, logp - profile["floor"]))
+            self._gram_tables[script] = table
+
+    def _load(self):
+        if self._profiles is not None:
+            return
+        with self._lock:
+            if self._profiles is not None:
+                return
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._set_profiles(json.load(f))
+            except Exception as e:
+                print(f"Error loading language profiles: {e}")
+                self._set_profiles({"languages": {}})
+
+    def scores(self, text):
+        """Log-likelihood of text under each language written in its script"""
+        self._load()
+        normalized = normalize_for_language_id(text)
+        script = detect_script(normalized)
+        candidates = self._by_script.get(script, [])
+        if len(candidates) <= 1:
+            return {code: 0.0 for code in candidates}
+        return self._scores(script, text_ngrams(normalized))
+
+    def _scores(self, script, grams):
+        candidates = self._by_script[script]
+        scores = [self._profiles[code]["floor"] * len(grams) for code in candidates]
+        table = self._gram_tables[script]
+        for gram in grams:
+            for i, gain in table.get(gram, ()):
+                scores[i] += gain
+        return dict(zip(candidates, scores))
+
+    def identify(self, text):
+        normalized = normalize_for_language_id(text or "")
+        if not normalized:
+            return None, 0.0, False
+        key = hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).digest()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        result = self._identify(normalized)
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def _identify(self, normalized):
+        self._load()
+        counts = script_counts(normalized)
+        if not counts:
+            return None, 0.0, False
+        script, letters = counts.most_common(1)[0]
+        share = letters / sum(counts.values())
+        candidates = self._by_script.get(script, [])
+        if not candidates:
+            return None, 0.0, False
+        if len(candidates) == 1:
+            # Only one known language uses this script
+            return fold_language_code(candidates[0]), round(share, 4), True
+        if letters < LANGUAGE_ID_MIN_LETTERS:
+            return None, 0.0, False
+
+        grams = text_ngrams(normalized)
+        scores = self._scores(script, grams)
+        best, runner_up = sorted(scores, key=scores.get, reverse=True)[:2]
+        # Softmax with the calibrated temperature turns likelihoods into a posterior
+        top = scores[best]
+        norm = sum(math.exp((score - top) / self._temperature) for score in scores.values())
+        confidence = share / norm
+        margin = confidence * (1 - math.exp((scores[runner_up] - top) / self._temperature))
+
+        # The posterior is relative to the known languages; the per-gram
+        # log-likelihood says whether the winner actually fits the text
+        reliable = top / len(grams) >= self._profiles[best].get("fit", -math.inf)
+        if len(normalized) < LANGUAGE_ID_FALLBACK_LENGTH and margin < LANGUAGE_ID_MIN_MARGIN:
+            reliable = False
+        return fold_language_code(best), round(confidence, 4), reliable
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+language_identifier = LanguageIdentifier()
+
+
+def sample_text(text, window=LANGUAGE_ID_WINDOW):
+    """At most window characters: the start and end of longer text"""
+    if len(text) <= window:
+        return text
+    half = window // 2
+    return f"{text[:half]} {text[-half:]}"
+
+
+class IncrementalDetector:
+    """Language detection for text that grows while the user types.
+
+    Appended text is checked on its own (bounded to window characters) and
+    kept when it agrees with the current verdict; the whole text is only
+    sampled again on a disagreement or an edit before the end. Once the
+    verdict has been confirmed stable_checks times at stable_confidence or
+    more, appends are not checked at all.
+
+    fallback(sample, result), if given, is called with each sample whose
+    result is not reliable and returns the result to use instead, so a
+    slower detector only ever sees the same bounded samples.
+    """
+
+    def __init__(self, identifier=language_identifier, window=LANGUAGE_ID_WINDOW,
+                 stable_confidence=LANGUAGE_ID_STABLE_CONFIDENCE, stable_checks=LANGUAGE_ID_STABLE_CHECKS,
+                 fallback=None):
+        self.identifier = identifier
+        self.fallback = fallback
+        self.window = window
+        self.stable_confidence = stable_confidence
+        self.stable_checks = stable_checks
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._text = ""
+        self._checked = 0  # Length of text covered by the verdict
+        self._verdict = (None, 0.0, False)
+        self._agreements = 0
+
+    @property
+    def stable(self):
+        return (self._verdict[0] is not None and self._verdict[2]
+                and self._verdict[1] >= self.stable_confidence
+                and self._agreements >= self.stable_checks)
+
+    def update(self, text):
+        with self._lock:
+            if not text:
+                self.reset()
+                return self._verdict
+            appended = self._verdict[0] is not None and text.startswith(self._text)
+            self._text = text
+            if not appended:
+                return self._redetect(text)
+            if self.stable or len(text) == self._checked:
+                return self._verdict
+
+            lang_code, confidence, reliable = self._identify(text[self._checked:])
+            if lang_code is None:
+                # Too little new text to judge; wait for more
+                return self._verdict
+            if lang_code == self._verdict[0]:
+                self._checked = len(text)
+                self._agreements += 1
+                self._verdict = (lang_code, max(self._verdict[1], confidence), self._verdict[2] or reliable)
+                return self._verdict
+            return self._redetect(text)
+
+    def _identify(self, text):
+        sample = sample_text(text, self.window)
+        result = self.identifier.identify(sample)
+        if self.fallback is not None and not result[2]:
+            result = self.fallback(sample, result)
+        return result
+
+    def _redetect(self, text):
+        self._verdict = self._identify(text)
+        self._checked = len(text)
+        self._agreements = 0
+        return self._verdict
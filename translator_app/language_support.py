@@ -1,9 +1,119 @@
-from deep_translator import GoogleTranslator
+import os
+import json
+import time
+import threading
+from .backends import get_backend
+from .config import DATA_DIR, LANGUAGE_CACHE_FILE, LANGUAGE_CACHE_TTL
 
-def initialize_language_support():
-    translator = GoogleTranslator()
-    language_dict = translator.get_supported_languages(as_dict=True)
+BUNDLED_LANGUAGES_FILE = os.path.join(DATA_DIR, "languages.json")
+
+
+def build_language_maps(language_dict):
     code_to_name = {v: k.title() for k, v in language_dict.items()}
     name_to_code = {k.title(): v for k, v in language_dict.items()}
     name_list = sorted(list(name_to_code.keys())) + ['Auto Detect']
     return code_to_name, name_to_code, name_list
+
+
+def fetch_supported_languages():
+    return get_backend().get_supported_languages()
+
+
+class LanguageRegistry:
+    """Supported languages with precomputed lookup maps.
+
+    Loads from the on-disk cache, falling back to the snapshot bundled with
+    the app, so startup is one file read and works offline. A stale cache is
+    refreshed from the network on a background thread.
+    """
+
+    def __init__(self, cache_file=LANGUAGE_CACHE_FILE, ttl=LANGUAGE_CACHE_TTL,
+                 bundled_file=BUNDLED_LANGUAGES_FILE):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.bundled_file = bundled_file
+        self.code_to_name = {}
+        self.name_to_code = {}
+        self.name_list = ['Auto Detect']
+        self.fetched_at = 0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    @property
+    def maps(self):
+        with self._lock:
+            return self.code_to_name, self.name_to_code, self.name_list
+
+    def _read(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        with self._lock:
+            self.code_to_name = data["code_to_name"]
+            self.name_to_code = data["name_to_code"]
+            self.name_list = data["name_list"]
+            self.fetched_at = data.get("fetched_at", 0)
+
+    def load(self):
+        for path in (self.cache_file, self.bundled_file):
+            try:
+                if os.path.exists(path):
+                    self._read(path)
+                    return True
+            except Exception as e:
+                print(f"Error loading language list from {path}: {e}")
+        return False
+
+    def is_stale(self):
+        return time.time() - self.fetched_at > self.ttl
+
+    def refresh(self):
+        code_to_name, name_to_code, name_list = build_language_maps(fetch_supported_languages())
+        fetched_at = time.time()
+        with self._lock:
+            self.code_to_name = code_to_name
+            self.name_to_code = name_to_code
+            self.name_list = name_list
+            self.fetched_at = fetched_at
+        data = {
+            "fetched_at": fetched_at,
+            "code_to_name": code_to_name,
+            "name_to_code": name_to_code,
+            "name_list": name_list
+        }
+        tmp_path = f"{self.cache_file}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_file)
+        return code_to_name, name_to_code, name_list
+
+    def refresh_in_background(self, on_update=None):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def refresh_worker():
+            try:
+                maps = self.refresh()
+                if on_update:
+                    on_update(*maps)
+            except Exception as e:
+                print(f"Language list refresh failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=refresh_worker, name="language-refresh", daemon=True).start()
+
+
+language_registry = LanguageRegistry()
+
+
+def initialize_language_support(on_update=None):
+    if not language_registry.load():
+        # No cache and no bundled snapshot; fall back to a blocking fetch
+        return language_registry.refresh()
+    # Offline backends would replace the full list with their few languages
+    if language_registry.is_stale() and not get_backend().offline:
+        language_registry.refresh_in_background(on_update)
+    return language_registry.maps
@@ -0,0 +1,129 @@
+# ===================== UI TASK SCHEDULER =====================
+# Debounced UI work on the Tk event loop instead of a threading.Timer (and an
+# OS thread) per keystroke. Tasks are coalesced by name, so a burst of events
+# leaves one pending run, and slow work goes to the shared thread pool with
+# only its result handed back to the UI thread.
+import time
+
+from .config import SCHEDULER_FRAME_BUDGET_MS
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+
+def _now_ms():
+    return time.monotonic() * 1000
+
+
+class _Task:
+    __slots__ = ("callback", "due", "priority", "deadline")
+
+    def __init__(self, callback, due, priority, deadline):
+        self.callback = callback
+        self.due = due
+        self.priority = priority
+        self.deadline = deadline
+
+
+class UIScheduler:
+    """Runs named tasks on the UI thread through root.after.
+
+    schedule() and cancel() must be called on the UI thread. Scheduling a
+    name that is already pending replaces it and restarts its delay, but
+    never past the deadline set by the first pending request, so continuous
+    typing still gets a run every deadline_ms. Tasks that fall due together
+    run highest priority first; whatever is left once a run has taken
+    SCHEDULER_FRAME_BUDGET_MS waits for the next turn of the event loop, so
+    input stays responsive.
+    """
+
+    def __init__(self, root, pool):
+        self.root = root
+        self.pool = pool
+        self._tasks = {}
+        self._generations = {}
+        self._after_id = None
+        self._after_due = None
+
+    def schedule(self, name, callback, delay_ms=0, priority=PRIORITY_NORMAL, deadline_ms=None):
+        now = _now_ms()
+        due = now + delay_ms
+        pending = self._tasks.get(name)
+        if pending is not None and pending.deadline is not None:
+            deadline = pending.deadline
+        else:
+            deadline = now + deadline_ms if deadline_ms is not None else None
+        if deadline is not None:
+            due = min(due, deadline)
+        self._tasks[name] = _Task(callback, due, priority, deadline)
+        self._arm()
+
+    def cancel(self, name):
+        """Drop the pending run of name and any result still on its way"""
+        self._tasks.pop(name, None)
+        self._generations[name] = self._generations.get(name, 0) + 1
+        self._arm()
+
+    def submit(self, name, work, on_done):
+        """Run work() on the pool and on_done(result) on the UI thread.
+
+        A later submit() or cancel() for the same name supersedes this one,
+        so on_done only ever sees the newest result.
+        """
+        generation = self._generations[name] = self._generations.get(name, 0) + 1
+
+        def deliver(result):
+            if self._generations.get(name) == generation:
+                on_done(result)
+
+        def run():
+            try:
+                result = work()
+            except Exception as e:
+                print(f"Background task {name} failed: {e}")
+                return
+            self.root.after(0, lambda: deliver(result))
+
+        return self.pool.submit(run)
+
+    def _arm(self):
+        due = min((task.due for task in self._tasks.values()), default=None)
+        if due == self._after_due:
+            return
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        self._after_due = due
+        if due is not None:
+            self._after_id = self.root.after(max(0, int(due - _now_ms())), self._run_due)
+
+    def _run_due(self):
+        self._after_id = None
+        self._after_due = None
+        started = _now_ms()
+        due = sorted(
+            ((name, task) for name, task in self._tasks.items() if task.due <= started),
+            key=lambda item: (item[1].priority, item[1].due)
+        )
+        for name, task in due:
+            # An earlier callback may have rescheduled or cancelled it
+            if self._tasks.get(name) is not task:
+                continue
+            del self._tasks[name]
+            try:
+                task.callback()
+            except Exception as e:
+                print(f"Scheduled task {name} failed: {e}")
+            if _now_ms() - started >= SCHEDULER_FRAME_BUDGET_MS:
+                break
+        self._arm()
+
+    def close(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+        self._after_id = None
+        self._after_due = None
+        self._tasks.clear()
+        for name in self._generations:
+            self._generations[name] += 1
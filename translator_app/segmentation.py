@@ -0,0 +1,83 @@
+# ===================== TEXT SEGMENTATION =====================
+import re
+
+# Sentence ends with terminal punctuation (Latin and CJK) followed by whitespace,
+# or right after CJK terminal punctuation which is not followed by spaces
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?\u2026])\s+|(?<=[\u3002\uff01\uff1f])\s*|\n\s*\n\s*')
+
+
+def split_sentences(text):
+    """Split text into sentence spans.
+
+    Returns a list of (start, end) offsets into text. Whitespace between
+    sentences is not part of any span, so text[end:next_start] is the
+    separator that followed each sentence.
+    """
+    spans = []
+    start = 0
+    for match in _SENTENCE_BOUNDARY.finditer(text):
+        if match.start() > start:
+            spans.append((start, match.start()))
+        start = match.end()
+    if start < len(text):
+        spans.append((start, len(text)))
+    # Trim surrounding whitespace inside spans
+    trimmed = []
+    for span_start, span_end in spans:
+        while span_start < span_end and text[span_start].isspace():
+            span_start += 1
+        while span_end > span_start and text[span_end - 1].isspace():
+            span_end -= 1
+        if span_start < span_end:
+            trimmed.append((span_start, span_end))
+    return trimmed
+
+
+def _split_long_span(text, start, end, max_chars):
+    # Hard split a single overlong sentence on whitespace
+    pieces = []
+    while end - start > max_chars:
+        cut = text.rfind(' ', start, start + max_chars)
+        if cut <= start:
+            cut = start + max_chars
+        pieces.append((start, cut))
+        start = cut
+        while start < end and text[start].isspace():
+            start += 1
+    if start < end:
+        pieces.append((start, end))
+    return pieces
+
+
+def split_into_chunks(text, max_chars):
+    """Pack whole sentences into chunks of at most max_chars characters.
+
+    Returns a list of (chunk, separator) pairs where separator is the
+    original whitespace that followed the chunk, so
+    "".join(chunk + separator) reproduces the stripped text.
+    """
+    spans = []
+    for start, end in split_sentences(text):
+        if end - start > max_chars:
+            spans.extend(_split_long_span(text, start, end, max_chars))
+        else:
+            spans.append((start, end))
+
+    chunks = []
+    chunk_start = chunk_end = None
+    for start, end in spans:
+        if chunk_start is None:
+            chunk_start, chunk_end = start, end
+        elif end - chunk_start <= max_chars:
+            chunk_end = end
+        else:
+            chunks.append((chunk_start, chunk_end))
+            chunk_start, chunk_end = start, end
+    if chunk_start is not None:
+        chunks.append((chunk_start, chunk_end))
+
+    result = []
+    for i, (start, end) in enumerate(chunks):
+        next_start = chunks[i + 1][0] if i + 1 < len(chunks) else end
+        result.append((text[start:end], text[end:next_start]))
+    return result
@@ -0,0 +1,110 @@
+# ===================== TEXT SIMILARITY =====================
+# Drop-in replacement for difflib.SequenceMatcher(...).ratio() in confidence
+# scoring. The score is 2 * LCS / (len(a) + len(b)), the same formula difflib
+# uses, with the longest common subsequence computed by a bit-parallel
+# algorithm (Hyyrö 2004) on Python integers: O(len(a) * len(b) / word size)
+# instead of difflib's worst-case quadratic matching.
+import re
+
+_WHITESPACE = re.compile(r'\s+')
+_PUNCTUATION = re.compile(r'[^\w\s]')
+
+
+def normalize_for_similarity(text):
+    text = _WHITESPACE.sub(' ', text).strip().lower()
+    return _PUNCTUATION.sub('', text)
+
+
+class PreparedText:
+    """Text normalized once, with its match bitmasks built on first use.
+
+    Reuse one PreparedText when comparing the same text against several
+    others (e.g. the input against its translation and back-translation).
+    """
+
+    __slots__ = ("text", "normalized", "tokens", "_char_masks", "_token_masks")
+
+    def __init__(self, text):
+        self.text = text
+        self.normalized = normalize_for_similarity(text)
+        self.tokens = self.normalized.split()
+        self._char_masks = None
+        self._token_masks = None
+
+    def masks(self, level):
+        if level == "token":
+            if self._token_masks is None:
+                self._token_masks = build_match_masks(self.tokens)
+            return self._token_masks
+        if self._char_masks is None:
+            self._char_masks = build_match_masks(self.normalized)
+        return self._char_masks
+
+    def sequence(self, level):
+        return self.tokens if level == "token" else self.normalized
+
+
+def prepare(text):
+    return text if isinstance(text, PreparedText) else PreparedText(text)
+
+
+def build_match_masks(sequence):
+    """Map each distinct item to a bitmask of the positions where it occurs"""
+    masks = {}
+    bit = 1
+    for item in sequence:
+        masks[item] = masks.get(item, 0) | bit
+        bit <<= 1
+    return masks
+
+
+def lcs_length(masks, length, other):
+    """Length of the longest common subsequence of a sequence and other.
+
+    masks and length describe the first sequence (see build_match_masks).
+    """
+    if not length or not other:
+        return 0
+    all_ones = (1 << length) - 1
+    v = all_ones
+    for item in other:
+        u = v & masks.get(item, 0)
+        v = (v + u) | (v - u)
+    # Zero bits inside the first sequence's width count matched positions
+    return length - (v & all_ones).bit_count()
+
+
+def similarity_ratio(a, b, level="char"):
+    """Similarity of a and b in [0, 1] after normalization.
+
+    a and b may be strings or PreparedText. level="char" compares characters
+    and tracks difflib closely; level="token" compares whole words and is
+    much cheaper on long texts.
+    """
+    a = prepare(a)
+    b = prepare(b)
+    seq_a = a.sequence(level)
+    seq_b = b.sequence(level)
+    total = len(seq_a) + len(seq_b)
+    if not total:
+        return 1.0
+    # Build masks over the shorter side so the integers stay small
+    if len(seq_a) > len(seq_b):
+        a, b, seq_a, seq_b = b, a, seq_b, seq_a
+    matches = lcs_length(a.masks(level), len(seq_a), seq_b)
+    return 2.0 * matches / total
+
+
+def batch_similarity(pairs, level="char"):
+    """Score many (a, b) pairs, normalizing each distinct string only once"""
+    prepared = {}
+
+    def get(text):
+        if isinstance(text, PreparedText):
+            return text
+        item = prepared.get(text)
+        if item is None:
+            item = prepared[text] = PreparedText(text)
+        return item
+
+    return [similarity_ratio(get(a), get(b), level) for a, b in pairs]
@@ -0,0 +1,90 @@
+# ===================== SINGLE-FLIGHT CALLS =====================
+import threading
+import concurrent.futures
+
+from .cancellation import CancellationToken, abort_on_cancel, check_cancelled
+from .config import SINGLEFLIGHT_WORKERS
+
+
+class _Call:
+    def __init__(self):
+        self.future = concurrent.futures.Future()
+        self.token = CancellationToken()
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution.
+
+    The first caller queues fn(token) on a bounded pool owned by this
+    instance, and every caller that arrives before it finishes gets the same
+    result or exception. fn must not wait on another call to the same
+    instance, or a full pool could deadlock. All
+    callers, the first included, only wait for it, so a caller whose own
+    token is cancelled returns at once; the shared call is only aborted once
+    all of its callers have been cancelled.
+    """
+
+    def __init__(self, max_workers=SINGLEFLIGHT_WORKERS):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="singleflight"
+        )
+
+    def do(self, key, fn, token=None):
+        check_cancelled(token)
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            call.waiters += 1
+
+        if leader:
+            try:
+                self._executor.submit(self._run, key, call, fn)
+            except RuntimeError as e:
+                # Closed: fail the call for every caller that joined it
+                call.future.set_exception(e)
+                self._forget(key, call)
+        with abort_on_cancel(token, lambda: self._leave(key, call)):
+            self._wait(call, token)
+        check_cancelled(token)
+        return call.future.result()
+
+    def _run(self, key, call, fn):
+        try:
+            # Every caller may have left while the call was queued
+            check_cancelled(call.token)
+            call.future.set_result(fn(call.token))
+        except BaseException as e:
+            call.future.set_exception(e)
+        finally:
+            self._forget(key, call)
+
+    def _wait(self, call, token):
+        woken = threading.Event()
+        call.future.add_done_callback(lambda _: woken.set())
+        with abort_on_cancel(token, woken.set):
+            woken.wait()
+
+    def _forget(self, key, call):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+    def close(self):
+        # Queued calls still run so their callers are not left waiting
+        self._executor.shutdown(wait=False)
+
+    def _leave(self, key, call):
+        with self._lock:
+            call.waiters -= 1
+            abandoned = call.waiters == 0
+            # Later callers start a fresh call rather than join a doomed one
+            if abandoned and self._calls.get(key) is call:
+                del self._calls[key]
+        if abandoned:
+            call.token.cancel()
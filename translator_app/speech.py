@@ -0,0 +1,147 @@
+# ===================== TEXT-TO-SPEECH PLAYBACK =====================
+# Long text is spoken segment by segment on the player's own thread:
+# segments are synthesized a few ahead on a small executor of its own while
+# earlier ones play, and each one is queued on a mixer channel as soon as
+# the previous one has started. Audio only ever lives in memory (and in the
+# TTS cache, written once the segment is playing).
+import io
+import threading
+import concurrent.futures
+
+import pygame
+from gtts import gTTS
+
+from .cancellation import CancellationToken, check_cancelled
+from .config import TTS_SEGMENT_CHARS, TTS_PREFETCH_SEGMENTS
+from .errors import TranslationCancelled
+from .segmentation import split_into_chunks
+from .tts_cache import tts_cache
+
+_POLL_SECONDS = 0.05
+
+
+def split_speech_segments(text, max_chars=TTS_SEGMENT_CHARS):
+    """Whole sentences packed into segments of at most max_chars"""
+    return [chunk for chunk, _ in split_into_chunks(text.strip(), max_chars)]
+
+
+class SpeechPlayer:
+    """Plays one text at a time; speak() stops whatever was playing.
+
+    on_error(exception) is called from the playback thread if synthesis or
+    playback fails.
+    """
+
+    def __init__(self, cache=tts_cache, segment_chars=TTS_SEGMENT_CHARS,
+                 prefetch=TTS_PREFETCH_SEGMENTS):
+        self.cache = cache
+        self.segment_chars = segment_chars
+        self.prefetch = prefetch
+        # Playback waits on synthesis, so it gets workers of its own rather
+        # than queueing behind other work on the app's thread pool
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=prefetch + 1, thread_name_prefix="tts"
+        )
+        self._token = None
+        self._channel = None
+        self._lock = threading.Lock()
+
+    def speak(self, text, lang_code, on_error=None):
+        token = CancellationToken()
+        with self._lock:
+            previous, self._token = self._token, token
+        if previous is not None:
+            previous.cancel()
+        self._stop_channel()
+        thread = threading.Thread(
+            target=self._run,
+            args=(text, lang_code, token, on_error),
+            name="speech",
+            daemon=True
+        )
+        thread.start()
+        return thread
+
+    def stop(self):
+        with self._lock:
+            token, self._token = self._token, None
+        if token is not None:
+            token.cancel()
+        self._stop_channel()
+
+    def _stop_channel(self):
+        channel = self._channel
+        if channel is not None and pygame.mixer.get_init():
+            channel.stop()
+
+    def close(self):
+        self.stop()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # --------------------- Synthesis ---------------------
+    def synthesize(self, segment, lang_code, token=None):
+        """(MP3 bytes for segment, whether they are new) from the cache or gTTS"""
+        check_cancelled(token)
+        audio = self.cache.get(segment, lang_code)
+        if audio is not None:
+            return audio, False
+        buffer = io.BytesIO()
+        gTTS(text=segment, lang=lang_code).write_to_fp(buffer)
+        return buffer.getvalue(), True
+
+    def _save(self, segment, lang_code, audio, fresh):
+        # Called once the segment is playing, so the disk write never delays it
+        if fresh:
+            self._executor.submit(self.cache.put, segment, lang_code, audio)
+
+    # --------------------- Playback ---------------------
+    def _wait_for(self, future, token):
+        while True:
+            done, _ = concurrent.futures.wait([future], timeout=_POLL_SECONDS)
+            check_cancelled(token)
+            if done:
+                return future.result()
+
+    def _run(self, text, lang_code, token, on_error):
+        segments = split_speech_segments(text, self.segment_chars)
+        futures = {}  # Segment index -> synthesis, dropped once played
+        channel = None
+
+        try:
+            for i in range(len(segments)):
+                # Keep up to prefetch segments synthesizing ahead of this one
+                for ahead in range(i, min(i + self.prefetch + 1, len(segments))):
+                    if ahead not in futures:
+                        futures[ahead] = self._executor.submit(self.synthesize, segments[ahead], lang_code, token)
+                audio, fresh = self._wait_for(futures.pop(i), token)
+                sound = pygame.mixer.Sound(io.BytesIO(audio))
+                if channel is None:
+                    check_cancelled(token)
+                    channel = self._channel = pygame.mixer.find_channel(True)
+                    channel.play(sound)
+                    self._save(segments[i], lang_code, audio, fresh)
+                    continue
+                # A channel holds one queued sound; wait until it has started
+                while channel.get_queue() is not None:
+                    if token.wait(_POLL_SECONDS):
+                        return
+                check_cancelled(token)
+                if channel.get_busy():
+                    channel.queue(sound)
+                else:
+                    channel.play(sound)  # Synthesis fell behind playback
+                self._save(segments[i], lang_code, audio, fresh)
+            while channel is not None and channel.get_busy():
+                if token.wait(_POLL_SECONDS):
+                    return
+        except TranslationCancelled:
+            pass
+        except Exception as e:
+            token.cancel()
+            if channel is not None:
+                channel.stop()
+            if on_error:
+                on_error(e)
+        finally:
+            for future in futures.values():
+                future.cancel()
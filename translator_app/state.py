@@ -1,28 +1,20 @@
 # ===================== SHARED STATE & ONE-TIME INITIALIZATION =====================
-import os
 import re
-import difflib
 import customtkinter as ctk
 import threading
 import pygame
 import concurrent.futures
-from langdetect import detect_langs, LangDetectException
-from deep_translator import GoogleTranslator
 from datetime import datetime
 import tkinter as tk
-import language_tool_python
 
 from .theme import get_bg_color, get_text_color, get_border_color
-import json
 from .config import (
     # fonts & sizes used in UI
     FONT_FAMILY, FONT_SIZE, FONT, BUTTON_FONT, HEADER_FONT,
     # limits/timeouts
-    MAX_TEXT_LENGTH, MAX_TRANSLATION_LENGTH, TRANSLATION_TIMEOUT,
-    # language helpers
-    SIMILAR_LANGUAGE_GROUPS, NOUN_CONTEXT_PHRASES,
-    # history file constants (if used here)
-    HISTORY_FILE, MAX_HISTORY_SIZE
+    MAX_TEXT_LENGTH, MAX_TRANSLATION_LENGTH,
+    # history and cache sizes
+    HISTORY_CARD_HEIGHT, HISTORY_SEARCH_DELAY_MS, MAX_CACHE_SIZE, TM_MAX_ENTRIES
 )
 
 from .theme import (
@@ -31,9 +23,7 @@ from .theme import (
     get_hover_color, get_secondary_text_color
 )
 
-import time
-from gtts import gTTS
-from .config import DEBOUNCE_TIME
+from .config import DEBOUNCE_TIME, TYPING_MAX_DELAY_MS, GRAMMAR_STARTUP_DELAY_MS
 from .theme import (
     get_bg_color, get_text_color, get_border_color,
     get_button_primary, get_button_secondary, get_button_danger,
@@ -41,16 +31,28 @@ from .theme import (
     get_actual_theme
 
 )
-from .language_support import initialize_language_support
+from . import engine
+from .engine import CancellationToken, TranslationError, TranslationCancelled
+from .history_store import history_store
+from .history_view import VirtualHistoryList
+from .scheduler import UIScheduler, PRIORITY_HIGH, PRIORITY_LOW
+from .speech import SpeechPlayer
 
 
 # --------------------- Global flags & locks  ---------------------
-cancelled = False
+# Token of the translation currently shown; replaced by every new request
+current_token = None
+# (text, source, target, noun mode) of that translation while it is running
+current_request_key = None
 translation_lock = threading.Lock()
-translation_history = []
-debounce_timer = None
-grammar_timer = None
+# True while the output box holds a translation memory suggestion
+memory_suggestion_shown = False
+# Carries the language verdict from one detection to the next while typing
+typing_detector = engine.IncrementalDetector(fallback=engine.recheck_language)
 active_tooltip = None
+active_tooltip_match = None
+# Grammar matches shown in each text box, for tooltip hit-testing
+mistake_indexes = {}
 
 # --------------------- Initialize pygame ----------------
 pygame.init()
@@ -58,6 +60,9 @@ pygame.init()
 # --------------------- Thread pool--------------------------
 thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=4)
 
+# --------------------- Text-to-speech --------------------------
+speech_player = SpeechPlayer()
+
 # --------------------- Main application ------------
 ctk.set_appearance_mode("System")
 ctk.set_default_color_theme("blue")
@@ -68,6 +73,10 @@ app.minsize(950, 600)
 app.grid_columnconfigure(0, weight=1)
 app.grid_rowconfigure(1, weight=1)
 
+# --------------------- UI scheduler --------------------------
+# Debounced typing work runs on the event loop; heavy parts on thread_pool
+scheduler = UIScheduler(app, thread_pool)
+
 # --------------------- Global UI references  -----
 header = None
 title_label = None
@@ -113,128 +122,29 @@ name_list = None
 main_frame = None
 
 def cleanup_resources():
-    global cancelled
-    cancelled = True
+    scheduler.close()
+    cancel_current_request()
+    speech_player.close()
     if pygame.mixer.get_init():
         pygame.mixer.music.stop()
         pygame.mixer.quit()
     thread_pool.shutdown(wait=False, cancel_futures=True)
-    for filename in os.listdir():
-        if filename.startswith("tts_") and filename.endswith(".mp3"):
-            try:
-                os.remove(filename)
-            except:
-                pass
-
-def is_identical_translation(original, translated):
-    norm_original = re.sub(r'\s+', ' ', original).strip().lower()
-    norm_translated = re.sub(r'\s+', ' ', translated).strip().lower()
-    norm_original = re.sub(r'[^\w\s]', '', norm_original)
-    norm_translated = re.sub(r'[^\w\s]', '', norm_translated)
-    matcher = difflib.SequenceMatcher(None, norm_original, norm_translated)
-    return matcher.ratio() > 0.95
-
-def calculate_confidence(original, back_translated):
-    def normalize(text):
-        text = re.sub(r'\s+', ' ', text).strip().lower()
-        return re.sub(r'[^\w\s]', '', text)
-    
-    norm_original = normalize(original)
-    norm_back = normalize(back_translated)
-    matcher = difflib.SequenceMatcher(None, norm_original, norm_back)
-    ratio = matcher.ratio()
-    length_factor = min(1.0, len(norm_original) / 50)
-    confidence = (ratio * 0.8 + length_factor * 0.2) * 100
-    return min(100, max(0, int(confidence)))
-
-def detect_language():
-    input_text = input_box.get("1.0", "end-1c").strip()
-    
-    if not input_text:
-        detected_lang_label.configure(text="")
-        return 'auto'
-    
-    # Improved detection for short text
-    if len(input_text) < 3:
-        try:
-            # Special handling for CJK characters
-            if any('\u4e00' <= char <= '\u9fff' for char in input_text):  # Chinese
-                detected_lang_label.configure(text="Detected: Chinese")
-                return 'zh'
-            if any('\u3040' <= char <= '\u309f' for char in input_text):  # Hiragana
-                detected_lang_label.configure(text="Detected: Japanese")
-                return 'ja'
-            if any('\u30a0' <= char <= '\u30ff' for char in input_text):  # Katakana
-                detected_lang_label.configure(text="Detected: Japanese")
-                return 'ja'
-            if any('\uac00' <= char <= '\ud7a3' for char in input_text):  # Hangul
-                detected_lang_label.configure(text="Detected: Korean")
-                return 'ko'
-            if any('\u0600' <= char <= '\u06ff' for char in input_text):  # Arabic
-                detected_lang_label.configure(text="Detected: Arabic")
-                return 'ar'
-        except:
-            pass
-        detected_lang_label.configure(text="Text too short for detection")
-        return 'auto'
-    
-    # Skip detection for numeric/symbol-only content
-    if not any(char.isalpha() for char in input_text):
-        detected_lang_label.configure(text="Text contains only numbers/symbols")
-        return 'auto'
-    
-    try:
-        # Use GoogleTranslator for better accuracy on short text
-        if len(input_text) < 10:
-            lang_code = GoogleTranslator().detect(input_text)
-            lang_name = code_to_name.get(lang_code, "Unknown")
-            detected_lang_label.configure(text=f"Detected: {lang_name}")
-            return lang_code
-        
-        # Use langdetect for longer text
-        detections = detect_langs(input_text)
-        if not detections:
-            detected_lang_label.configure(text="Detection Failed")
-            return 'auto'
-        
-        best_detection = detections[0]
-        lang_code = best_detection.lang
-        confidence = best_detection.prob
-        
-        # Handle similar language groups
-        for base_lang, variants in SIMILAR_LANGUAGE_GROUPS.items():
-            if lang_code in variants:
-                lang_code = base_lang
-                break
-        
-        # Special case for Chinese
-        if lang_code in ['zh-cn', 'zh-tw']:
-            lang_code = 'zh'
-            lang_name = "Chinese"
-        else:
-            lang_name = code_to_name.get(lang_code, "Unknown")
-            
-        conf_text = f"{confidence*100:.1f}%"
-        
-        if confidence < 0.5:
-            detected_lang_label.configure(text=f"Detected: {lang_name} (Low confidence: {conf_text})")
-        else:
-            detected_lang_label.configure(text=f"Detected: {lang_name} ({conf_text})")
-            
-        return lang_code
-        
-    except LangDetectException:
-        detected_lang_label.configure(text="Detection Error")
-        return 'auto'
-    except Exception as e:
-        print(f"Detection error: {e}")
-        detected_lang_label.configure(text="Detection Failed")
-        return 'auto'
+    engine.translation_cache.flush()
+    history_store.close()
+    engine.close_grammar_tools()
+    engine.close_flights()
+    engine.close_backends()
+
+def detect_language(input_text=None, incremental=False):
+    if input_text is None:
+        input_text = input_box.get("1.0", "end-1c").strip()
+    detector = typing_detector if incremental else None
+    lang_code, _, message = engine.detect_language(input_text, detector)
+    detected_lang_label.configure(text=message)
+    return lang_code
 
 def translate_text():
-    global cancelled
-    cancelled = False
-    
+    global memory_suggestion_shown
     input_text = input_box.get("1.0", "end-1c").strip()
     
     # Add input sanitization
@@ -271,7 +181,15 @@ def translate_text():
     target_code = name_to_code.get(target_lang)
     if not target_code:
         return
+    
+    use_noun_mode = noun_mode.get() == 1
+    backend = engine.get_backend().name
+    request_key = (input_text, source_lang_code, target_code, use_noun_mode)
+    if request_key == current_request_key and not current_token.cancelled:
+        # Same request already running (repeated Ctrl+T); its result is on the way
+        return
 
+    memory_suggestion_shown = False
     progress_bar.start()
     translate_btn.configure(state="disabled")
     cancel_btn.configure(state="normal")
@@ -281,150 +199,155 @@ def translate_text():
     output_box.insert("1.0", "Translating...")
     app.update_idletasks()
     
+    token = start_request(request_key)
+    
+    def on_chunk(index, piece):
+        # Long texts stream in sentence-aligned chunks, in order
+        post_if_current(token, lambda: append_translation_chunk(index, piece))
+    
+    def save_result(result):
+        history_entry = {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "source": f"{source_lang} ({source_lang_code})",
+            "target": f"{target_lang} ({target_code})",
+            "original": input_text,
+            "translated": result["translated"],
+            "confidence": result["confidence"] if result["confidence"] is not None else -1,
+            "noun_mode": use_noun_mode,
+            "backend": backend
+        }
+        save_to_history(history_entry)
+        if not result["cached"]:
+            engine.translation_cache.flush()
+    
+    def confidence_worker(result):
+        # Follow-up back-translation; dropped if the user has moved on
+        scored = None
+        try:
+            if not token.cancelled:
+                scored = engine.score_translation(
+                    input_text, result, source_lang_code, target_code, use_noun_mode,
+                    token=token
+                )
+        except TranslationError:
+            pass
+        except Exception as e:
+            print(f"Confidence scoring error: {e}")
+        save_result(scored or result)
+        
+        if scored:
+            post_if_current(token, lambda: update_confidence(
+                scored["confidence"], scored["back_translation_failed"]
+            ))
+        post_if_current(token, finish_request)
+    
     def translation_worker():
-        global cancelled
+        scoring = False
         try:
-            # Enhanced noun translation using context phrases
-            if noun_mode.get() == 1 and char_count < 50:
-                # Handle Chinese variants
-                if source_lang_code in ['zh-cn', 'zh-tw']:
-                    source_lang_code_used = 'zh'
-                else:
-                    source_lang_code_used = source_lang_code
-                    
-                if target_code in ['zh-cn', 'zh-tw']:
-                    target_code_used = 'zh'
-                else:
-                    target_code_used = target_code
-                
-                context_phrase = NOUN_CONTEXT_PHRASES.get(source_lang_code_used, NOUN_CONTEXT_PHRASES["en"])
-                context_text = context_phrase.format(text=input_text)
-                
-                # Translate context phrase
-                translated = GoogleTranslator(
-                    source=source_lang_code_used, 
-                    target=target_code_used
-                ).translate(context_text, timeout=TRANSLATION_TIMEOUT)
-                
-                if cancelled:
-                    app.after(0, lambda: show_error("Translation cancelled"))
-                    return
-                
-                # Extract the translated noun by removing the context phrase
-                context_target = NOUN_CONTEXT_PHRASES.get(target_code_used, NOUN_CONTEXT_PHRASES["en"])
-                if context_target in translated:
-                    translated = translated.replace(context_target, "").strip()
-                else:
-                    # Fallback to standard translation if context removal fails
-                    translated = GoogleTranslator(
-                        source=source_lang_code_used, 
-                        target=target_code_used
-                    ).translate(input_text, timeout=TRANSLATION_TIMEOUT)
-            else:
-                # Standard translation
-                if source_lang_code in ['zh-cn', 'zh-tw']:
-                    source_lang_code_used = 'zh'
-                else:
-                    source_lang_code_used = source_lang_code
-                    
-                if target_code in ['zh-cn', 'zh-tw']:
-                    target_code_used = 'zh'
-                else:
-                    target_code_used = target_code
-                
-                translated = GoogleTranslator(
-                    source=source_lang_code_used, 
-                    target=target_code_used
-                ).translate(input_text, timeout=TRANSLATION_TIMEOUT)
-            
-            if cancelled:
-                app.after(0, lambda: show_error("Translation cancelled"))
-                return
-                
-            if not translated or translated.strip() == "":
-                app.after(0, lambda: show_error("Empty translation result"))
-                return
-                
-            if is_identical_translation(input_text, translated):
-                app.after(0, lambda: show_error("Translation identical to input"))
-                return
-            
-            confidence = -1
-            back_translation_failed = False
+            result = engine.translate_primary(
+                input_text, source_lang_code, target_code, use_noun_mode,
+                token=token,
+                on_chunk=on_chunk
+            )
             
-            if char_count <= MAX_TEXT_LENGTH and char_count > 0:
-                try:
-                    back_translated = GoogleTranslator(
-                        source=target_code_used, 
-                        target=source_lang_code_used
-                    ).translate(translated, timeout=TRANSLATION_TIMEOUT)
-                    
-                    if cancelled:
-                        app.after(0, lambda: show_error("Translation cancelled"))
-                        return
-                    
-                    if not back_translated or back_translated.strip() == "":
-                        back_translation_failed = True
-                    else:
-                        confidence = calculate_confidence(input_text, back_translated)
-                except Exception as e:
-                    back_translation_failed = True
-                    print(f"Back translation error: {e}")
-            else:
-                confidence = -1
-                
-            history_entry = {
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "source": f"{source_lang} ({source_lang_code})",
-                "target": f"{target_lang} ({target_code})",
-                "original": input_text,
-                "translated": translated,
-                "confidence": confidence,
-                "noun_mode": noun_mode.get() == 1
-            }
-            save_to_history(history_entry)
-            
-            app.after(0, lambda: update_translation_result(
-                translated, 
-                confidence, 
-                back_translation_failed,
-                target_code_used
+            # Render the translation now; confidence follows in the background
+            post_if_current(token, lambda: update_translation_result(
+                result["translated"], 
+                result["confidence"], 
+                result["back_translation_failed"],
+                result["target_code_used"]
             ))
+            if result["confidence"] is None:
+                scoring = True
+                thread_pool.submit(confidence_worker, result)
+            else:
+                save_result(result)
             
-        except Exception as e:
+        except TranslationCancelled:
+            # Whoever cancelled the token has already updated the UI
+            pass
+        except TranslationError as e:
             error_msg = str(e)
-            if "timed out" in error_msg.lower():
-                error_msg = "Translation timed out. Try shorter text."
-            elif "connection" in error_msg.lower():
-                error_msg = "Network error. Check your internet connection."
-            elif "too many requests" in error_msg.lower():
-                error_msg = "API limit exceeded. Please wait before trying again."
-            else:
-                error_msg = f"Translation failed: {e}"
-            app.after(0, lambda: show_error(f"Error: {error_msg}"))
+            post_if_current(token, lambda: show_error(error_msg))
+        except Exception as e:
+            error_msg = engine.describe_error(e)
+            post_if_current(token, lambda: show_error(f"Error: {error_msg}"))
         finally:
-            app.after(0, lambda: [progress_bar.stop(), 
-                                  progress_bar.set(0),
-                                  translate_btn.configure(state="normal"),
-                                  cancel_btn.configure(state="disabled")])
+            post_if_current(token, lambda: [progress_bar.stop(), 
+                                            progress_bar.set(0),
+                                            translate_btn.configure(state="normal"),
+                                            cancel_btn.configure(state="disabled")])
+            if not scoring:
+                post_if_current(token, finish_request)
     
     with translation_lock:
         thread_pool.submit(translation_worker)
 
+def start_request(request_key=None):
+    """Cancel the translation in flight, if any, and return a token for a new one"""
+    global current_token, current_request_key
+    cancel_current_request()
+    current_token = CancellationToken()
+    current_request_key = request_key
+    return current_token
+
+def finish_request():
+    global current_request_key
+    current_request_key = None
+
+def cancel_current_request():
+    # Aborts in-flight backend calls; their results are then dropped
+    finish_request()
+    if current_token is not None:
+        current_token.cancel()
+
+def cancel_translation():
+    if current_token is not None and not current_token.cancelled:
+        cancel_current_request()
+        show_error("Translation cancelled")
+
+def post_if_current(token, callback):
+    """Run callback on the UI thread unless token's request was cancelled or superseded"""
+    def run():
+        if token is current_token and not token.cancelled:
+            callback()
+    app.after(0, run)
+
+def append_translation_chunk(index, piece):
+    output_box.configure(state="normal")
+    if index == 0:
+        output_box.delete("1.0", "end")
+    output_box.insert("end", piece)
+    output_box.configure(state="disabled")
+
 def update_translation_result(translated, confidence, back_translation_failed, target_code):
     output_box.configure(state="normal")
     output_box.delete("1.0", "end")
     output_box.insert("1.0", translated)
     output_box.configure(state="disabled")
     
-    if confidence == -1:
-        confidence_label.configure(text="Confidence: Not calculated for long texts")
+    update_confidence(confidence, back_translation_failed)
+    
+    if len(translated) <= MAX_TEXT_LENGTH:
+        def check_output(_=None):
+            check_mistakes("output_grammar", output_box, translated, target_code)
+        # A cold target language rechecks the output once it has started
+        if get_grammar_tool(target_code, on_ready=lambda _: app.after(0, check_output)):
+            check_output()
+
+def update_confidence(confidence, back_translation_failed):
+    if confidence is None:
+        confidence_label.configure(text="Confidence: Calculating...")
         confidence_bar.set(0)
         confidence_bar.configure(progress_color="#95A5A6")
     elif back_translation_failed:
         confidence_label.configure(text="Confidence: Back-translation failed")
         confidence_bar.set(0)
         confidence_bar.configure(progress_color="#95A5A6")
+    elif confidence == -1:
+        confidence_label.configure(text="Confidence: Not calculated for long texts")
+        confidence_bar.set(0)
+        confidence_bar.configure(progress_color="#95A5A6")
     else:
         confidence_label.configure(text=f"Confidence: {confidence}%")
         color = (
@@ -434,11 +357,6 @@ def update_translation_result(translated, confidence, back_translation_failed, t
         )
         confidence_bar.set(confidence / 100)
         confidence_bar.configure(progress_color=color)
-    
-    if len(translated) <= MAX_TEXT_LENGTH:
-        grammar_tool = get_grammar_tool(target_code)
-        if grammar_tool:
-            underline_mistakes(output_box, translated, target_code)
 
 def show_error(message):
     print(f"ERROR: {message}")
@@ -452,137 +370,126 @@ def show_error(message):
     progress_bar.set(0)
 
 # ===================== GRAMMAR CHECKING =====================
-grammar_tools = {
-    'en': language_tool_python.LanguageTool('en-US'),
-}
-
-def get_grammar_tool(lang_code):
-    base_lang = lang_code.split('-')[0].lower()
-    return grammar_tools.get(base_lang)
+def get_grammar_tool(lang_code, on_ready=None):
+    return engine.get_grammar_tool(lang_code, on_ready=on_ready)
 
 def clear_tooltip():
-    global active_tooltip
+    global active_tooltip, active_tooltip_match
     if active_tooltip:
         active_tooltip.destroy()
         active_tooltip = None
+    active_tooltip_match = None
 
-def underline_mistakes(text_widget, text, lang_code):
-    if not text.strip() or len(text) > MAX_TEXT_LENGTH:
-        return
-        
-    # Skip grammar check for non-text content
-    if not any(char.isalpha() for char in text):
+def check_mistakes(task_name, text_widget, text, lang_code):
+    # Skip cleanly until the grammar engine has finished starting
+    if not engine.is_grammar_ready(lang_code):
         return
-        
-    # Skip grammar check for non-Latin scripts
-    if any('\u4e00' <= char <= '\u9fff' for char in text):  # Chinese
-        return
-    if any('\u3040' <= char <= '\u30ff' for char in text):  # Japanese
-        return
-    if any('\uac00' <= char <= '\ud7a3' for char in text):  # Korean
+    if not engine.is_grammar_checkable(text):
         return
-    if any('\u0600' <= char <= '\u06ff' for char in text):  # Arabic
-        return
-        
-    try:
-        tool = get_grammar_tool(lang_code)
-        if not tool:
+    
+    # LanguageTool runs on a pooled worker; the underlines are only applied
+    # if the widget still shows the text that was checked
+    def apply(matches):
+        current = text_widget.get("1.0", "end-1c")
+        if current.strip() != text.strip():
             return
-            
-        text_widget.tag_remove("mistake", "1.0", "end")
-        
-        matches = tool.check(text)
-        for match in matches:
-            start = f"1.0 + {match.offset} chars"
-            end = f"1.0 + {match.offset + match.errorLength} chars"
-            text_widget.tag_add("mistake", start, end)
+        shift = (len(current) - len(current.lstrip())) - (len(text) - len(text.lstrip()))
+        underline_mistakes(text_widget, current, [match.shifted(shift) for match in matches])
+    scheduler.submit(task_name, lambda: engine.check_grammar(text, lang_code, wait=False), apply)
 
+def underline_mistakes(text_widget, text, matches):
+    # matches are offsets into text, the widget's full content
+    try:
+        index = engine.MatchIndex(text, matches)
+        mistake_indexes[text_widget] = index
+        clear_tooltip()
+        text_widget.tag_remove("mistake", "1.0", "end")
+        if index:
+            # One Tk call with plain line.column indexes for every range
+            text_widget.tag_add("mistake", *index.tag_ranges())
         text_widget.tag_config("mistake", underline=True, underlinefg="red")
-        
-        def show_tooltip(event):
-            clear_tooltip()
-            index = text_widget.index(f"@{event.x},{event.y}")
-            
-            for match in matches:
-                start_idx = f"1.0 + {match.offset} chars"
-                end_idx = f"1.0 + {match.offset + match.errorLength} chars"
-                
-                if text_widget.compare(index, ">=", start_idx) and text_widget.compare(index, "<=", end_idx):
-                    global active_tooltip
-                    active_tooltip = tk.Toplevel(app)
-                    active_tooltip.wm_overrideredirect(True)
-                    x = event.x_root + 15
-                    y = event.y_root + 15
-                    active_tooltip.wm_geometry(f"+{int(x)}+{int(y)}")
-                    
-                    bg_color = get_bg_color()
-                    fg_color = get_text_color()
-                    border_color = get_border_color()
-                    
-                    suggestion = match.replacements[0] if match.replacements else ""
-                    message = match.message
-                    if suggestion:
-                        message = f"{message}\nSuggested: {suggestion}"
-                    
-                    label = tk.Label(
-                        active_tooltip, 
-                        text=message, 
-                        background=bg_color, 
-                        foreground=fg_color,
-                        relief="solid", 
-                        borderwidth=1,
-                        padx=12,
-                        pady=8,
-                        font=(FONT_FAMILY, 10),
-                        wraplength=300,
-                        bd=0,
-                        highlightbackground=border_color,
-                        highlightthickness=1,
-                        justify="left"
-                    )
-                    label.pack()
-                    
-                    def on_leave(e):
-                        clear_tooltip()
-                    
-                    label.bind("<Leave>", on_leave)
-                    active_tooltip.after(5000, clear_tooltip)
-                    break
-                    
-        text_widget.bind("<Motion>", show_tooltip)
-        
     except Exception as e:
         print(f"Grammar check error: {e}")
 
+def show_mistake_tooltip(event):
+    # Bound once to <Motion> of both text boxes
+    global active_tooltip, active_tooltip_match
+    text_widget = event.widget
+    index = mistake_indexes.get(text_widget)
+    match = None
+    if index:
+        offset = index.offset(text_widget.index(f"@{event.x},{event.y}"))
+        if offset is not None:
+            match = index.match_at(offset)
+    if match is not None and match is active_tooltip_match and active_tooltip:
+        return  # Still over the mistake whose tooltip is showing
+    clear_tooltip()
+    if match is None:
+        return
+    
+    active_tooltip = tk.Toplevel(app)
+    active_tooltip_match = match
+    active_tooltip.wm_overrideredirect(True)
+    x = event.x_root + 15
+    y = event.y_root + 15
+    active_tooltip.wm_geometry(f"+{int(x)}+{int(y)}")
+    
+    bg_color = get_bg_color()
+    fg_color = get_text_color()
+    border_color = get_border_color()
+    
+    suggestion = match.replacements[0] if match.replacements else ""
+    message = match.message
+    if suggestion:
+        message = f"{message}\nSuggested: {suggestion}"
+    
+    label = tk.Label(
+        active_tooltip, 
+        text=message, 
+        background=bg_color, 
+        foreground=fg_color,
+        relief="solid", 
+        borderwidth=1,
+        padx=12,
+        pady=8,
+        font=(FONT_FAMILY, 10),
+        wraplength=300,
+        bd=0,
+        highlightbackground=border_color,
+        highlightthickness=1,
+        justify="left"
+    )
+    label.pack()
+    
+    def on_leave(e):
+        clear_tooltip()
+    
+    label.bind("<Leave>", on_leave)
+    active_tooltip.after(5000, clear_tooltip)
+
 # ===================== HISTORY MANAGEMENT =====================
 def load_history():
-    try:
-        if os.path.exists(HISTORY_FILE):
-            with open(HISTORY_FILE, 'r', encoding='utf-8-sig') as f:
-                return json.load(f)
-    except Exception as e:
-        print(f"Error loading history: {e}")
-    return []
+    # Opens the history database, importing an older JSON history once
+    history_store.load()
 
 def save_to_history(entry):
-    translation_history.append(entry)
-    if len(translation_history) > MAX_HISTORY_SIZE:
-        translation_history.pop(0)
-    try:
-        with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-            json.dump(translation_history, f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        print(f"Error saving history: {e}")
+    # Safe from worker threads; the SQLite insert happens on the history writer thread
+    history_store.add(entry)
 
-def create_history_card(scroll_frame, entry, idx):
+def create_history_card(parent, on_use, on_delete):
+    # Reusable card; fill_history_card shows an entry in it
+    slot = ctk.CTkFrame(parent, fg_color="transparent", corner_radius=0)
+    slot.entry_id = None
+    slot.index = None
+    
     card = ctk.CTkFrame(
-        scroll_frame, 
+        slot, 
         border_width=1,
         border_color=get_border_color(),
         corner_radius=8,
         fg_color=get_bg_color()  # Match current theme
     )
-    card.grid(row=idx, column=0, sticky="ew", padx=5, pady=8)  # Increased padding
+    card.pack(fill="both", expand=True, padx=5, pady=8)  # Increased padding
     card.grid_columnconfigure(0, weight=1)
     card.grid_rowconfigure(0, weight=1)
     
@@ -595,35 +502,35 @@ def create_history_card(scroll_frame, entry, idx):
     header_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
     header_frame.grid(row=0, column=0, sticky="ew", pady=(0, 10))
     
-    time_label = ctk.CTkLabel(
+    slot.time_label = ctk.CTkLabel(
         header_frame, 
-        text=entry["timestamp"],
+        text="",
         font=(FONT_FAMILY, 11, "italic"),
         anchor="w",
         text_color=get_secondary_text_color()
     )
-    time_label.pack(side="left", fill="x", expand=True)
+    slot.time_label.pack(side="left", fill="x", expand=True)
     
     lang_frame = ctk.CTkFrame(header_frame, fg_color="transparent")
     lang_frame.pack(side="right", padx=(10, 0))
     
-    ctk.CTkLabel(
+    slot.lang_label = ctk.CTkLabel(
         lang_frame, 
-        text=f"{entry['source'].split(' (')[0]} → {entry['target'].split(' (')[0]}",
+        text="",
         font=(FONT_FAMILY, 12, "bold"),
         anchor="e",
         text_color=get_text_color()
-    ).pack(side="right")
-    
-    if entry.get("noun_mode", False):
-        noun_tag = ctk.CTkLabel(
-            lang_frame,
-            text="(Noun Mode)",
-            font=(FONT_FAMILY, 10, "italic"),
-            text_color=get_button_secondary(),
-            anchor="e"
-        )
-        noun_tag.pack(side="right", padx=(0, 5))
+    )
+    slot.lang_label.pack(side="right")
+    
+    # Packed only for noun mode entries
+    slot.noun_tag = ctk.CTkLabel(
+        lang_frame,
+        text="(Noun Mode)",
+        font=(FONT_FAMILY, 10, "italic"),
+        text_color=get_button_secondary(),
+        anchor="e"
+    )
     
     # Text content
     text_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
@@ -640,7 +547,7 @@ def create_history_card(scroll_frame, entry, idx):
         anchor="w"
     ).grid(row=0, column=0, sticky="w")
     
-    original_text = ctk.CTkTextbox(
+    slot.original_text = ctk.CTkTextbox(
         orig_frame, 
         height=90,  
         width = 675, # Increased height
@@ -652,9 +559,8 @@ def create_history_card(scroll_frame, entry, idx):
         fg_color=get_bg_color(),
         text_color=get_text_color()
     )
-    original_text.insert("1.0", entry["original"])
-    original_text.configure(state="disabled")
-    original_text.grid(row=1, column=0, sticky="ew", pady=(5, 0))
+    slot.original_text.configure(state="disabled")
+    slot.original_text.grid(row=1, column=0, sticky="ew", pady=(5, 0))
     
     # Translated text
     trans_frame = ctk.CTkFrame(text_frame, fg_color="transparent")
@@ -667,7 +573,7 @@ def create_history_card(scroll_frame, entry, idx):
         anchor="w"
     ).grid(row=0, column=0, sticky="w")
     
-    translated_text = ctk.CTkTextbox(
+    slot.translated_text = ctk.CTkTextbox(
         trans_frame, 
         height=90,  
         width = 675,
@@ -679,9 +585,8 @@ def create_history_card(scroll_frame, entry, idx):
         fg_color=get_bg_color(),
         text_color=get_text_color()
     )
-    translated_text.insert("1.0", entry["translated"])
-    translated_text.configure(state="disabled")
-    translated_text.grid(row=1, column=0, sticky="ew", pady=(5, 0))
+    slot.translated_text.configure(state="disabled")
+    slot.translated_text.grid(row=1, column=0, sticky="ew", pady=(5, 0))
     
     # Confidence and actions
     footer_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
@@ -700,28 +605,13 @@ def create_history_card(scroll_frame, entry, idx):
         anchor="w"
     ).pack(side="left", padx=(0, 5))
     
-    if entry["confidence"] == -1:
-        conf_text = "Not calculated"
-        conf_color = "#95A5A6"
-    elif entry["confidence"] == 0:
-        conf_text = "Failed"
-        conf_color = "#95A5A6"
-    else:
-        conf_text = f"{entry['confidence']}%"
-        conf_color = (
-            "#27AE60" if entry["confidence"] >= 80 else
-            "#F39C12" if entry["confidence"] >= 50 else
-            "#E74C3C"
-        )
-    
-    conf_label = ctk.CTkLabel(
+    slot.conf_label = ctk.CTkLabel(
         conf_frame, 
-        text=conf_text,
+        text="",
         font=(FONT_FAMILY, 11),
-        text_color=conf_color,
         anchor="w"
     )
-    conf_label.pack(side="left")
+    slot.conf_label.pack(side="left")
     
     # Action buttons - increased size and consistent styling
     action_frame = ctk.CTkFrame(footer_frame, fg_color="transparent")
@@ -730,7 +620,7 @@ def create_history_card(scroll_frame, entry, idx):
     use_btn = ctk.CTkButton(
         action_frame,
         text="Use Translation",
-        command=lambda e=entry: use_history_entry(e),
+        command=lambda: on_use(slot.entry_id),
         width=140,  # Increased width
         height=30,   # Increased height
         font=BUTTON_FONT,
@@ -743,7 +633,7 @@ def create_history_card(scroll_frame, entry, idx):
     delete_btn = ctk.CTkButton(
         action_frame,
         text="Delete",
-        command=lambda idx=len(translation_history)-1-idx: delete_history_entry(idx, scroll_frame),
+        command=lambda: on_delete(slot.entry_id, slot.index),
         width=100,   # Increased width
         height=30,   # Increased height
         font=BUTTON_FONT,
@@ -753,10 +643,41 @@ def create_history_card(scroll_frame, entry, idx):
     )
     delete_btn.grid(row=0, column=1)
     
-    return card
+    return slot
+
+def fill_history_card(slot, entry, index):
+    slot.entry_id = entry["id"]
+    slot.index = index
+    slot.time_label.configure(text=entry["timestamp"])
+    slot.lang_label.configure(text=f"{entry['source'].split(' (')[0]} → {entry['target'].split(' (')[0]}")
+    if entry.get("noun_mode", False):
+        slot.noun_tag.pack(side="right", padx=(0, 5))
+    else:
+        slot.noun_tag.pack_forget()
+    
+    for textbox, text in ((slot.original_text, entry["original"]), (slot.translated_text, entry["translated"])):
+        textbox.configure(state="normal")
+        textbox.delete("1.0", "end")
+        textbox.insert("1.0", text)
+        textbox.configure(state="disabled")
+    
+    if entry["confidence"] == -1:
+        conf_text = "Not calculated"
+        conf_color = "#95A5A6"
+    elif entry["confidence"] == 0:
+        conf_text = "Failed"
+        conf_color = "#95A5A6"
+    else:
+        conf_text = f"{entry['confidence']}%"
+        conf_color = (
+            "#27AE60" if entry["confidence"] >= 80 else
+            "#F39C12" if entry["confidence"] >= 50 else
+            "#E74C3C"
+        )
+    slot.conf_label.configure(text=conf_text, text_color=conf_color)
 
 def show_history():
-    if not translation_history:
+    if not history_store.count():
         return
         
     history_window = ctk.CTkToplevel(app)
@@ -819,59 +740,81 @@ def show_history():
     )
     close_btn.grid(row=0, column=1)
     
-    # Scrollable history area
-    scroll_frame = ctk.CTkScrollableFrame(
-        main_frame,
-        fg_color="transparent"
+    # Full-text search over original and translated text
+    search_var = tk.StringVar()
+    search_entry = ctk.CTkEntry(
+        header_frame,
+        textvariable=search_var,
+        placeholder_text="Search history...",
+        height=30,
+        font=(FONT_FAMILY, 12)
     )
-    scroll_frame.grid(row=1, column=0, sticky="nsew", padx=15, pady=(0, 15))
-    scroll_frame.grid_columnconfigure(0, weight=1)
+    search_entry.grid(row=1, column=0, columnspan=2, sticky="ew", pady=(10, 0))
     
-    # Add history entries
-    for idx, entry in enumerate(reversed(translation_history)):
-        create_history_card(scroll_frame, entry, idx)
+    # Virtualized history area; only the cards in view are built
+    def current_search():
+        return search_var.get().strip() or None
+    
+    def delete_entry(entry_id, index):
+        delete_history_entry(entry_id, index, history_list)
+        update_status()
+    
+    history_list = VirtualHistoryList(
+        main_frame,
+        row_height=HISTORY_CARD_HEIGHT,
+        create_card=lambda parent: create_history_card(parent, use_history_entry, delete_entry),
+        fill_card=fill_history_card,
+        fetch=lambda offset, limit: history_store.query(offset, limit, search=current_search()),
+        count=lambda: history_store.count(search=current_search())
+    )
+    history_list.grid(row=1, column=0, sticky="nsew", padx=15, pady=(0, 15))
     
     # Status footer
     status_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
     status_frame.grid(row=2, column=0, sticky="ew", padx=15, pady=(0, 15))
     
-    ctk.CTkLabel(
+    status_label = ctk.CTkLabel(
         status_frame,
-        text=f"Entries: {len(translation_history)} ",
+        text="",
         font=(FONT_FAMILY, 12),
         text_color=get_secondary_text_color()
-    ).pack(side="left")
+    )
+    status_label.pack(side="left")
+    
+    def update_status():
+        status_label.configure(text=f"Entries: {history_list.total} ")
+    
+    def refresh():
+        history_list.reload()
+        update_status()
+    
+    # Requery once typing pauses rather than on every keystroke
+    pending_search = [None]
+    
+    def schedule_search(*args):
+        if pending_search[0]:
+            history_window.after_cancel(pending_search[0])
+        pending_search[0] = history_window.after(HISTORY_SEARCH_DELAY_MS, refresh)
+    
+    search_var.trace_add("write", schedule_search)
+    refresh()
     
     return history_window
 
 def clear_history(history_window):
-    global translation_history
-    translation_history = []
-    try:
-        if os.path.exists(HISTORY_FILE):
-            os.remove(HISTORY_FILE)
-    except Exception as e:
-        print(f"Error clearing history: {e}")
+    history_store.clear()
     history_window.destroy()
     show_error("History cleared")
 
-def delete_history_entry(index, scroll_frame):
-    global translation_history
-    if 0 <= index < len(translation_history):
-        del translation_history[index]
-        try:
-            with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-                json.dump(translation_history, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(f"Error saving history: {e}")
-        
-        for widget in scroll_frame.winfo_children():
-            widget.destroy()
-        
-        for idx, entry in enumerate(reversed(translation_history)):
-            create_history_card(scroll_frame, entry, idx)
+def delete_history_entry(entry_id, index, history_list):
+    # Only the visible cards at or below the deleted one are refilled
+    history_store.delete(entry_id)
+    history_list.remove(index)
 
-def use_history_entry(entry):
+def use_history_entry(entry_id):
+    entry = history_store.get(entry_id)
+    if not entry:
+        return
     input_box.delete("1.0", "end")
     input_box.insert("1.0", entry["original"])
     
@@ -889,52 +832,21 @@ def text_to_speech(text, lang_code):
     if not text or not lang_code or lang_code == 'auto':
         show_error("Language not supported for TTS")
         return
-        
-    def tts_worker():
-        filename = None
-        try:
-            filename = f"tts_{time.time()}.mp3"
-            tts = gTTS(text=text, lang=lang_code)
-            tts.save(filename)
-            
-            pygame.mixer.music.load(filename)
-            pygame.mixer.music.play()
-            
-            start_time = time.time()
-            while pygame.mixer.music.get_busy():
-                if time.time() - start_time > 60:
-                    break
-                time.sleep(0.1)
-                
-        except Exception as e:
-            error_msg = str(e)
-            if "language not supported" in error_msg.lower():
-                error_msg = "TTS not supported for this language"
-            app.after(0, lambda: show_error(f"TTS Error: {error_msg}"))
-        finally:
-            if filename and os.path.exists(filename):
-                try:
-                    # Retry mechanism for file deletion
-                    for i in range(5):
-                        try:
-                            os.remove(filename)
-                            break
-                        except:
-                            time.sleep(0.1)
-                except:
-                    pass
-    
-    if pygame.mixer.music.get_busy():
-        pygame.mixer.music.stop()
-        
-    thread_pool.submit(tts_worker)
+    
+    def on_error(e):
+        # Called from a worker thread
+        error_msg = str(e)
+        if "language not supported" in error_msg.lower():
+            error_msg = "TTS not supported for this language"
+        app.after(0, lambda: show_error(f"TTS Error: {error_msg}"))
+    
+    # Playback starts with the first sentence; stops anything still playing
+    speech_player.speak(text, lang_code, on_error)
 
 def auto_detect_typing(event=None):
-    global debounce_timer
-    if debounce_timer:
-        debounce_timer.cancel()
-    debounce_timer = threading.Timer(DEBOUNCE_TIME, safe_detect_typing)
-    debounce_timer.start()
+    scheduler.schedule(
+        "detect", safe_detect_typing, int(DEBOUNCE_TIME * 1000), PRIORITY_HIGH, TYPING_MAX_DELAY_MS
+    )
 
 def safe_detect_typing():
     input_text = input_box.get("1.0", "end-1c").strip()
@@ -942,26 +854,52 @@ def safe_detect_typing():
     char_count_label.configure(text=f"Chars: {char_count}")
     
     if input_text:
-        lang_code = detect_language()
-        if char_count <= MAX_TEXT_LENGTH:
-            source_lang = source_combo.get()
-            if source_lang == "English" or source_lang == "Auto Detect":
-                auto_check_grammar()
+        lang_code = detect_language(input_text, incremental=True)
+        show_memory_suggestion(input_text, lang_code)
+
+def show_memory_suggestion(input_text, detected_code):
+    # Fill the output with the closest past translation while the user types
+    global memory_suggestion_shown
+    if output_box.get("1.0", "end-1c").strip() and not memory_suggestion_shown:
+        return  # never overwrite a real translation
+    
+    target_code = name_to_code.get(target_combo.get())
+    source_lang = source_combo.get()
+    source_code = detected_code if source_lang == "Auto Detect" else name_to_code.get(source_lang, 'auto')
+    match = None
+    if target_code:
+        match = engine.suggest_translation(input_text, source_code, target_code, noun_mode.get() == 1)
+    
+    if match:
+        output_box.configure(state="normal")
+        output_box.delete("1.0", "end")
+        output_box.insert("1.0", match["translated"])
+        output_box.configure(state="disabled")
+        confidence_label.configure(text=f"Memory match: {round(match['score'] * 100)}%")
+        confidence_bar.set(match["score"])
+        memory_suggestion_shown = True
+    elif memory_suggestion_shown:
+        output_box.configure(state="normal")
+        output_box.delete("1.0", "end")
+        output_box.configure(state="disabled")
+        confidence_label.configure(text="")
+        confidence_bar.set(0)
+        memory_suggestion_shown = False
 
 def auto_check_grammar():
-    global grammar_timer
-    if grammar_timer:
-        grammar_timer.cancel()
-    grammar_timer = threading.Timer(DEBOUNCE_TIME, safe_check_grammar)
-    grammar_timer.start()
+    scheduler.schedule(
+        "grammar", safe_check_grammar, int(DEBOUNCE_TIME * 1000), PRIORITY_LOW, TYPING_MAX_DELAY_MS
+    )
 
 def safe_check_grammar():
+    if not engine.is_grammar_ready('en'):
+        return
     input_text = input_box.get("1.0", "end-1c").strip()
     if input_text and len(input_text) <= MAX_TEXT_LENGTH:
         source_lang = source_combo.get()
         if source_lang == "English" or source_lang == "Auto Detect":
             if any(char.isalpha() for char in input_text):
-                underline_mistakes(input_box, input_text, 'en')
+                check_mistakes("input_grammar", input_box, input_text, 'en')
 
 def update_header_colors():
     """Update header colors based on current theme"""
@@ -1101,8 +1039,12 @@ def update_ui_colors():
     update_status_bar_colors()
 
 def clear_all():
-    global cancelled
-    cancelled = True
+    global memory_suggestion_shown
+    cancel_current_request()
+    memory_suggestion_shown = False
+    typing_detector.reset()
+    mistake_indexes.clear()
+    speech_player.stop()
     if pygame.mixer.get_init():
         try:
             if pygame.mixer.music.get_busy():
@@ -1128,9 +1070,9 @@ def clear_all():
     noun_mode.set(0)
     progress_bar.set(0)  # Explicitly reset progress bar
     progress_bar.stop()  # Ensure it stops animating
+    translate_btn.configure(state="normal")
+    cancel_btn.configure(state="disabled")
     confidence_bar.set(0)
-    
-    cancelled = False
 
 def copy_output():
     output_text = output_box.get("1.0", "end-1c").strip()
@@ -1577,7 +1519,7 @@ def setup_action_buttons():
     cancel_btn = ctk.CTkButton(
         action_frame, 
         text="✖ Cancel",
-        command=lambda: globals().update({'cancelled': True}),
+        command=cancel_translation,
         width=100,
         height=38,  # Increased height
         font=BUTTON_FONT,
@@ -1685,15 +1627,24 @@ def setup_event_bindings():
     input_box.bind("<KeyRelease>", 
         lambda e: [auto_detect_typing(), auto_check_grammar()]
     )
+    for text_widget in (input_box, output_box):
+        text_widget.bind("<Motion>", show_mistake_tooltip)
 
 def initialize_application():
     # Load translation history
-    global translation_history
-    translation_history = load_history()
+    load_history()
+    
+    # Warm the translation cache from disk and recent translations, oldest first
+    engine.translation_cache.load()
+    engine.translation_cache.warm_from_history(reversed(history_store.recent(MAX_CACHE_SIZE)))
+    # The translation memory indexes far more entries, so it is built off the UI thread
+    thread_pool.submit(
+        lambda: engine.translation_memory.warm_from_history(reversed(history_store.query(0, TM_MAX_ENTRIES)))
+    )
     
     # Initialize language support
     global code_to_name, name_to_code, name_list
-    code_to_name, name_to_code, name_list = initialize_language_support()
+    code_to_name, name_to_code, name_list = engine.get_language_maps(on_update=on_languages_updated)
     
     # Create UI
     create_main_ui()
@@ -1704,4 +1655,21 @@ def initialize_application():
     # Final initialization
     update_ui_colors()
     input_box.focus_set()
+    
+    # Boot grammar engines in the background once the window is up
+    app.after(GRAMMAR_STARTUP_DELAY_MS, lambda: engine.start_grammar_tools(on_ready=on_grammar_ready))
+
+def on_languages_updated(new_code_to_name, new_name_to_code, new_name_list):
+    # Called from the language refresh thread
+    def apply_languages():
+        global code_to_name, name_to_code, name_list
+        code_to_name, name_to_code, name_list = new_code_to_name, new_name_to_code, new_name_list
+        if source_combo and target_combo:
+            source_combo.configure(values=name_list)
+            target_combo.configure(values=name_list)
+    app.after(0, apply_languages)
+
+def on_grammar_ready(lang_code):
+    # Called from the grammar startup thread; recheck whatever was typed meanwhile
+    app.after(0, safe_check_grammar)
 
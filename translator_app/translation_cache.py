@@ -0,0 +1,140 @@
+# ===================== TRANSLATION CACHE =====================
+import os
+import re
+import json
+import threading
+from collections import OrderedDict
+
+from .config import CACHE_FILE, MAX_CACHE_SIZE, MAX_TEXT_LENGTH
+
+_CODE_PATTERN = re.compile(r'\(([^()]*)\)\s*$')
+_KEY_FIELDS = 5
+
+# History rows saved before the backend was recorded all came from Google
+LEGACY_BACKEND = "google"
+
+
+def normalize_cache_text(text):
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def make_cache_key(text, source_code, target_code, noun_mode, backend):
+    # A flat string key keeps the on-disk format plain JSON
+    return "\x1f".join([
+        normalize_cache_text(text),
+        source_code or 'auto',
+        target_code or '',
+        "1" if noun_mode else "0",
+        backend
+    ])
+
+
+def code_from_label(label):
+    # History stores languages as "English (en)"
+    match = _CODE_PATTERN.search(label or "")
+    return match.group(1) if match else None
+
+
+def has_final_confidence(entry):
+    """False for history rows saved after their back-translation failed.
+
+    Those keep confidence -1 although the text was short enough to score;
+    only text longer than MAX_TEXT_LENGTH is never scored.
+    """
+    return entry.get("confidence", -1) != -1 or len(entry.get("original") or "") > MAX_TEXT_LENGTH
+
+
+class TranslationCache:
+    """Size-bounded LRU cache of translations backed by a JSON file.
+
+    Entries are kept apart per backend, so one backend's output is never
+    served for another.
+    """
+
+    def __init__(self, path=CACHE_FILE, max_size=MAX_CACHE_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._dirty = False
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, text, source_code, target_code, noun_mode, backend):
+        key = make_cache_key(text, source_code, target_code, noun_mode, backend)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return dict(entry)
+
+    def put(self, text, source_code, target_code, noun_mode, backend, translated, confidence=-1):
+        if not translated or not translated.strip():
+            return
+        key = make_cache_key(text, source_code, target_code, noun_mode, backend)
+        with self._lock:
+            self._entries[key] = {"translated": translated, "confidence": confidence}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8-sig') as f:
+                    data = json.load(f)
+                with self._lock:
+                    # File is stored oldest first, so insertion order is LRU order
+                    for key, entry in data.items():
+                        # Keys from before backends were recorded could
+                        # belong to any backend, so they are dropped
+                        if key.count("\x1f") != _KEY_FIELDS - 1:
+                            self._dirty = True
+                            continue
+                        self._entries[key] = entry
+                        self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_size:
+                        self._entries.popitem(last=False)
+        except Exception as e:
+            print(f"Error loading translation cache: {e}")
+
+    def warm_from_history(self, history):
+        for entry in history:
+            source_code = code_from_label(entry.get("source"))
+            target_code = code_from_label(entry.get("target"))
+            if not target_code or not entry.get("original") or not has_final_confidence(entry):
+                continue
+            self.put(
+                entry["original"],
+                source_code,
+                target_code,
+                entry.get("noun_mode", False),
+                entry.get("backend") or LEGACY_BACKEND,
+                entry.get("translated", ""),
+                entry.get("confidence", -1)
+            )
+
+    def flush(self):
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = dict(self._entries)
+                self._dirty = False
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"Error saving translation cache: {e}")
@@ -0,0 +1,192 @@
+# ===================== TRANSLATION MEMORY =====================
+# Fuzzy lookup of past translations. Originals are indexed by character
+# trigrams; a query only collects candidates from its rarest trigrams, keeps
+# those whose trigram overlap reaches candidate_dice(threshold), and then
+# verifies every one of them with similarity_ratio. Exact repeats are found
+# through a separate dict on the whitespace-normalized original.
+import math
+import threading
+from collections import OrderedDict
+
+from .config import TM_THRESHOLD, TM_MAX_ENTRIES
+from .similarity import normalize_for_similarity, similarity_ratio
+from .translation_cache import LEGACY_BACKEND, code_from_label, has_final_confidence, normalize_cache_text
+
+NGRAM_SIZE = 3
+
+
+def candidate_dice(threshold, n=NGRAM_SIZE):
+    """Trigram Dice cutoff for entries that may reach threshold similarity.
+
+    similarity_ratio counts characters, and one edited character changes up
+    to n grams, so Dice can sit well below the similarity itself ("where is
+    the bus station" vs "where is the train station": 0.84 similar, 0.76
+    Dice). 1 - n * (1 - threshold) leaves room for that; 0 means no cutoff.
+    """
+    return max(0.0, 1 - n * (1 - threshold))
+
+
+def char_ngrams(normalized, n=NGRAM_SIZE):
+    padded = f" {normalized} "
+    if len(padded) <= n:
+        return frozenset([padded])
+    return frozenset(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+
+class TranslationMemory:
+    """Bounded, thread-safe memory of past translations with fuzzy lookup.
+
+    Matches are scored in [0, 1] with similarity_ratio on normalized text;
+    only entries for the same backend, target language (and source language,
+    unless it is 'auto') and noun mode are returned. exact_match() only returns an
+    entry whose original is the same text up to whitespace. The oldest
+    entries are dropped beyond max_entries.
+    """
+
+    def __init__(self, threshold=TM_THRESHOLD, max_entries=TM_MAX_ENTRIES):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (normalized, source, target, noun, backend) -> record
+        self._indexes = {}  # (target, noun, backend) -> {trigram: set of entry keys}
+        self._exact = {}  # (exact text, target, noun, backend) -> {source: entry key}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def add(self, original, translated, source_code, target_code, noun_mode, backend, confidence=-1):
+        normalized = normalize_for_similarity(original or "")
+        if not normalized or not translated or not target_code:
+            return
+        key = (normalized, source_code or 'auto', target_code, bool(noun_mode), backend)
+        record = {
+            "original": original,
+            "translated": translated,
+            "source_code": key[1],
+            "target_code": target_code,
+            "noun_mode": key[3],
+            "confidence": confidence,
+            "exact": normalize_cache_text(original),
+            "grams": char_ngrams(normalized),
+        }
+        with self._lock:
+            if key in self._entries:
+                self._unindex(key, self._entries.pop(key))
+            self._entries[key] = record
+            index = self._indexes.setdefault(key[2:], {})
+            for gram in record["grams"]:
+                index.setdefault(gram, set()).add(key)
+            self._exact.setdefault((record["exact"],) + key[2:], {})[key[1]] = key
+            while len(self._entries) > self.max_entries:
+                self._unindex(*self._entries.popitem(last=False))
+
+    def _unindex(self, key, record):
+        index = self._indexes.get(key[2:], {})
+        for gram in record["grams"]:
+            keys = index.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[gram]
+        exact_key = (record["exact"],) + key[2:]
+        sources = self._exact.get(exact_key, {})
+        if sources.get(key[1]) == key:
+            del sources[key[1]]
+            if not sources:
+                del self._exact[exact_key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._indexes.clear()
+            self._exact.clear()
+
+    def warm_from_history(self, history):
+        for entry in history:
+            # Unscored rows would be reused without ever being rescored
+            if not has_final_confidence(entry):
+                continue
+            self.add(
+                entry.get("original"),
+                entry.get("translated"),
+                code_from_label(entry.get("source")),
+                code_from_label(entry.get("target")),
+                entry.get("noun_mode", False),
+                entry.get("backend") or LEGACY_BACKEND,
+                entry.get("confidence", -1)
+            )
+
+    def lookup(self, text, source_code, target_code, noun_mode, backend, threshold=None, limit=3):
+        """Best matches at or above threshold, highest score first"""
+        threshold = self.threshold if threshold is None else threshold
+        normalized = normalize_for_similarity(text or "")
+        if not normalized or threshold <= 0:
+            return []
+        grams = char_ngrams(normalized)
+        size = len(grams)
+        cutoff = candidate_dice(threshold)
+        length = len(normalized)
+        partition = (target_code, bool(noun_mode), backend)
+
+        with self._lock:
+            index = self._indexes.get(partition, {})
+            if cutoff > 0:
+                # Dice(A, B) >= cutoff bounds |B| and the overlap a candidate
+                # needs, so it must contain one of the size - min_shared + 1
+                # rarest grams
+                min_size = size * cutoff / (2 - cutoff)
+                min_shared = math.ceil(cutoff * (size + min_size) / 2)
+                ranked = sorted(grams, key=lambda gram: len(index.get(gram, ())))
+                candidates = set()
+                for gram in ranked[:max(1, size - min_shared + 1)]:
+                    candidates.update(index.get(gram, ()))
+            else:
+                # Too loose a threshold for the index to rule anything out
+                candidates = [key for key in self._entries if key[2:] == partition]
+            records = []
+            for key in candidates:
+                # 2 * LCS / (|a| + |b|) can never exceed what the lengths allow
+                other = len(key[0])
+                if 2 * min(length, other) / (length + other) < threshold:
+                    continue
+                if source_code not in (None, 'auto') and key[1] not in (source_code, 'auto'):
+                    continue
+                record = self._entries[key]
+                dice = 2 * len(grams & record["grams"]) / (size + len(record["grams"]))
+                if dice >= cutoff:
+                    records.append((key[0], record))
+
+        matches = []
+        for original_normalized, record in records:
+            score = similarity_ratio(normalized, original_normalized)
+            if score >= threshold:
+                match = self._public(record)
+                match["score"] = round(score, 4)
+                matches.append(match)
+        matches.sort(key=lambda m: m["score"], reverse=True)
+        return matches[:limit]
+
+    def best_match(self, text, source_code, target_code, noun_mode, backend, threshold=None):
+        matches = self.lookup(text, source_code, target_code, noun_mode, backend, threshold, limit=1)
+        return matches[0] if matches else None
+
+    def exact_match(self, text, source_code, target_code, noun_mode, backend):
+        """The entry for this exact text (up to whitespace), or None"""
+        exact = normalize_cache_text(text or "")
+        with self._lock:
+            sources = self._exact.get((exact, target_code, bool(noun_mode), backend))
+            if not sources:
+                return None
+            if source_code in (None, 'auto'):
+                key = next(reversed(sources.values()))
+            else:
+                key = sources.get(source_code) or sources.get('auto')
+            if key is None:
+                return None
+            match = self._public(self._entries[key])
+        match["score"] = 1.0
+        return match
+
+    def _public(self, record):
+        return {k: v for k, v in record.items() if k not in ("grams", "exact")}
@@ -0,0 +1,128 @@
+# ===================== TTS AUDIO CACHE =====================
+# Synthesized speech is stored on disk under the user cache directory, named
+# by a hash of (language, text), so replaying a phrase needs no network call.
+# The least recently played files are removed beyond TTS_CACHE_MAX_MB.
+import os
+import sys
+import hashlib
+import threading
+from collections import OrderedDict
+
+from .config import APP_CACHE_NAME, TTS_CACHE_MAX_MB
+
+
+def user_cache_dir(name=APP_CACHE_NAME):
+    """Per-user cache directory for the platform"""
+    if os.name == 'nt':
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, name)
+
+
+class TTSCache:
+    """Thread-safe, size-capped LRU of audio files keyed by content.
+
+    get(text, lang_code) returns the cached audio bytes or None; put()
+    stores new audio bytes.
+    """
+
+    def __init__(self, directory=None, max_bytes=TTS_CACHE_MAX_MB * 1024 * 1024):
+        self.directory = directory or os.path.join(user_cache_dir(), "tts")
+        self.max_bytes = max_bytes
+        self._files = None  # OrderedDict of filename -> size, least recent first
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _key(self, text, lang_code):
+        digest = hashlib.sha256(f"{lang_code}\x1f{text}".encode('utf-8')).hexdigest()
+        return f"{digest}.mp3"
+
+    def _load(self):
+        # One directory scan per run; afterwards the index is kept in memory
+        if self._files is not None:
+            return
+        self._files = OrderedDict()
+        self._size = 0
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name.endswith(".mp3"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name, stat.st_size))
+            for _, name, size in sorted(entries):
+                self._files[name] = size
+                self._size += size
+        except OSError as e:
+            print(f"Error loading TTS cache: {e}")
+
+    def get(self, text, lang_code):
+        name = self._key(text, lang_code)
+        path = os.path.join(self.directory, name)
+        with self._lock:
+            self._load()
+            if name not in self._files:
+                return None
+            if not os.path.exists(path):
+                self._size -= self._files.pop(name)
+                return None
+            self._files.move_to_end(name)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            # mtime records recency across runs
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def put(self, text, lang_code, data):
+        name = self._key(text, lang_code)
+        path = os.path.join(self.directory, name)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with self._lock:
+            self._load()
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Error saving TTS audio: {e}")
+            return
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        size = len(data)
+        with self._lock:
+            self._size += size - self._files.pop(name, 0)
+            self._files[name] = size
+            self._evict(keep=name)
+
+    def _evict(self, keep):
+        for name in list(self._files):
+            if self._size <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            self._size -= self._files.pop(name)
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._load()
+            for name in list(self._files):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+            self._files.clear()
+            self._size = 0
+
+
+tts_cache = TTSCache()